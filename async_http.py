@@ -0,0 +1,185 @@
+# async_http.py
+"""
+Motor HTTP asyncio para los fetchers de Azure DevOps y GitHub.
+
+Un solo hilo, un solo cliente httpx con keep-alive (y HTTP/2 si está instalado 'h2'):
+miles de requests en vuelo acotadas por ASYNC_MAX_IN_FLIGHT en lugar de un hilo por
+rama. Se activa con HTTP_ENGINE=async; con el valor por defecto ("threads") las
+etapas siguen usando requests + ThreadPoolExecutor. Solo lo usan las etapas sueltas
+(tests/test_*.py, STAGE_RUNNER=pytest): el runner en proceso (pipeline.py) es por hilos. Las páginas de GitHub pasan por
+la misma caché condicional (ETag) que el motor por hilos, y los errores de conexión
+y 5xx se reintentan con la misma política (HTTP_RETRIES, backoff con jitter).
+"""
+
+import asyncio
+import os
+from collections import deque
+
+import github_pages
+import http_cache
+import http_client
+import rate_limit
+
+try:
+    import httpx
+except ImportError:  # dependencia opcional: sin httpx se usa el motor por hilos
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (solo para saber si HTTP/2 está disponible)
+    _H2_AVAILABLE = True
+except ImportError:
+    _H2_AVAILABLE = False
+
+HTTP_ENGINE = os.getenv("HTTP_ENGINE", "threads").strip().lower()
+ASYNC_MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "256"))
+HTTP2 = os.getenv("HTTP2", "1") != "0" and _H2_AVAILABLE
+
+
+def enabled():
+    return HTTP_ENGINE == "async" and httpx is not None
+
+
+def _parse_next_link(link_header):
+    """URL de rel="next" en el header Link de GitHub, o None."""
+    if not link_header:
+        return None
+    for part in link_header.split(","):
+        segs = part.split(";")
+        if len(segs) >= 2 and segs[1].strip() == 'rel="next"':
+            return segs[0].strip().strip("<>")
+    return None
+
+
+class AsyncEngine:
+    """
+    Cliente compartido por todas las corrutinas de una etapa:
+
+        async with AsyncEngine() as engine:
+            resp = await engine.get(url, headers=...)
+            resp = await engine.post(url, json=..., auth=...)
+    """
+
+    def __init__(self, max_in_flight=ASYNC_MAX_IN_FLIGHT, http2=HTTP2):
+        self.max_in_flight = max_in_flight
+        self.http2 = http2
+        self.requests_sent = 0
+        self._client = None
+        self._sem = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(
+            max_connections=self.max_in_flight,
+            max_keepalive_connections=self.max_in_flight,
+        )
+        self._client = httpx.AsyncClient(http2=self.http2, limits=limits, timeout=60)
+        self._sem = asyncio.Semaphore(self.max_in_flight)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+
+    async def get(self, url, params=None, headers=None, auth=None, cached=False):
+        """GET con el planificador por host; cached=True pasa por la caché condicional en disco."""
+        if cached:
+            return await http_cache.cached_get_async(
+                lambda u, p, h: self._get(u, p, h, auth), url, params=params, headers=headers, auth=auth)
+        return await self._get(url, params, headers, auth)
+
+    async def post(self, url, params=None, json=None, headers=None, auth=None):
+        """POST con el planificador por host; como en http_client, los POST no se reintentan."""
+        return await self._request("POST", url, params, headers, auth, json=json)
+
+    async def _send(self, method, url, params, headers, auth, json=None):
+        """Una request; los GET con los reintentos de http_client (conexión y 5xx, backoff con jitter)."""
+        retries = http_client.HTTP_RETRIES if method == "GET" else 0
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                async with self._sem:
+                    self.requests_sent += 1
+                    resp = await self._client.request(method, url, params=params, headers=headers,
+                                                      auth=auth, json=json)
+            except httpx.TransportError:
+                if last:
+                    raise
+            else:
+                # Agotados los reintentos se devuelve la última respuesta (raise_for_status decide)
+                if resp.status_code not in http_client.RETRY_STATUSES or last:
+                    return resp
+            await asyncio.sleep(http_client.jitter_backoff(attempt))
+
+    async def _get(self, url, params, headers, auth):
+        return await self._request("GET", url, params, headers, auth)
+
+    async def _request(self, method, url, params, headers, auth, json=None):
+        # Mismo planificador por host que los fetchers por hilos
+        scheduler = rate_limit.scheduler
+        for attempt in range(rate_limit.RATE_LIMIT_MAX_RETRIES + 1):
+            await scheduler.acquire_async(url)
+            resp = await self._send(method, url, params, headers, auth, json=json)
+            if scheduler.observe(url, resp.status_code, resp.headers, attempt) is None:
+                break
+        return resp
+
+    async def github_pages(self, url, params=None, headers=None, ok_missing=(404,), window=1):
+        """
+        Itera páginas de GitHub. Con window=1 sigue Link: rel="next"; con window>1 y
+        rel="last" pide las páginas 2..N en paralelo (a lo sumo 'window' en vuelo), en orden.
+        """
+        resp = await self.get(url, params=params, headers=headers, cached=True)
+        if resp.status_code in ok_missing:
+            return
+        resp.raise_for_status()
+        yield resp.json()
+
+        last = github_pages.last_page(resp.headers.get("Link"))
+        if window > 1 and last:
+            async for data in self._windowed_pages(str(resp.url), last, headers, window):
+                yield data
+            return
+
+        url = _parse_next_link(resp.headers.get("Link"))
+        while url:
+            resp = await self.get(url, headers=headers, cached=True)   # la URL de 'next' ya trae los query params
+            resp.raise_for_status()
+            yield resp.json()
+            url = _parse_next_link(resp.headers.get("Link"))
+
+    async def _windowed_pages(self, base, last, headers, window):
+        async def fetch(page):
+            resp = await self.get(github_pages.with_page(base, page), headers=headers, cached=True)
+            resp.raise_for_status()
+            return resp.json()
+
+        in_flight = deque()
+        next_page = 2
+        try:
+            while next_page <= last or in_flight:
+                while next_page <= last and len(in_flight) < window:
+                    in_flight.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+                yield await in_flight.popleft()
+        finally:
+            # Cierre anticipado: las páginas que aún no salieron se cancelan
+            for task in in_flight:
+                task.cancel()
+
+    async def azure_pages(self, url, params=None, headers=None, auth=None, ok_missing=(404,)):
+        """Itera páginas de Azure DevOps siguiendo x-ms-continuationtoken."""
+        params = dict(params or {})
+        while True:
+            resp = await self.get(url, params=params, headers=headers, auth=auth)
+            if resp.status_code in ok_missing:
+                return
+            resp.raise_for_status()
+            yield resp.json()
+            continuation = resp.headers.get("x-ms-continuationtoken")
+            if not continuation:
+                return
+            params["continuationToken"] = continuation
+
+
+def run(coro):
+    """Ejecuta una corrutina de etapa desde código síncrono (los tests de pytest)."""
+    return asyncio.run(coro)
@@ -0,0 +1,309 @@
+# azure_commits.py
+"""
+Fetchers alternativos del historial de commits de Azure DevOps.
+
+Por ventanas de fecha (AZURE_COMMIT_SLICES > 1): una rama larga se parte en N
+ventanas searchCriteria.fromDate/toDate entre la fecha de su commit más viejo y la
+de su tip, y cada ventana se pagina en su propio hilo. La primera y la última
+ventana quedan abiertas (sin fromDate / sin toDate) para no perder commits con
+fechas fuera de ese rango. Las ventanas vecinas se solapan un segundo (la API
+compara con precisión de segundos y no garantiza bordes inclusivos): un commit
+justo en el borde cae al menos en una, y los repetidos se descartan al unir.
+
+Por commitsbatch (AZURE_HISTORY_BACKEND=commitsbatch): POST .../commitsbatch con
+paginación propia ($skip/$top, hasta una página vacía). Un CommitsBatchFetcher por
+repo comparte sesión (keep-alive) entre todas las ramas del repo y acumula métricas
+de throughput.
+
+Ambos modos tienen variante asyncio (iter_sliced_pages_async, iter_pages_async) para
+HTTP_ENGINE=async: las ventanas van como tareas del event loop en lugar de hilos.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import http_client
+import rate_limit
+import repo_inventory
+from config import AZURE_TOKEN
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+AZURE_COMMIT_SLICES = int(os.getenv("AZURE_COMMIT_SLICES", "1"))   # 1 = paginación serial
+AZURE_HISTORY_BACKEND = os.getenv("AZURE_HISTORY_BACKEND", "rest").strip().lower()
+AZURE_BATCH_PAGE = int(os.getenv("AZURE_BATCH_PAGE", "1000"))
+
+_API_VERSION = "7.2-preview.2"
+_AZ_AUTH = ("", AZURE_TOKEN)
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def _format_date(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _branch_criteria(branch):
+    return {
+        "searchCriteria.itemVersion.versionType": "branch",
+        "searchCriteria.itemVersion.version": branch,
+        "api-version": _API_VERSION,
+    }
+
+
+def _edge_params(branch, oldest):
+    params = {**_branch_criteria(branch), "$top": 1}
+    if oldest:
+        params["searchCriteria.showOldestCommitsFirst"] = "true"
+    return params
+
+
+def _edge_value(resp):
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    values = resp.json().get("value", [])
+    return values[0] if values else None
+
+
+def _edge_commit(session, repo_id, branch, oldest):
+    """Tip de la rama (oldest=False) o su commit más viejo (oldest=True); None si no hay."""
+    resp = rate_limit.get(session, repo_inventory.azure_repo_url(repo_id, "commits"),
+                          params=_edge_params(branch, oldest), auth=_AZ_AUTH, timeout=60)
+    return _edge_value(resp)
+
+
+async def _edge_commit_async(engine, repo_id, branch, oldest):
+    resp = await engine.get(repo_inventory.azure_repo_url(repo_id, "commits"),
+                            params=_edge_params(branch, oldest), auth=_AZ_AUTH)
+    return _edge_value(resp)
+
+
+def _committer_date(commit):
+    return _parse_date((commit or {}).get("committer", {}).get("date"))
+
+
+def date_windows(start, end, slices):
+    """
+    [(from, to)] con 'slices' ventanas iguales entre start y end, de la más nueva a la
+    más vieja. Los bordes exteriores van abiertos (None) y cada fromDate interior
+    arranca un segundo antes del toDate de la ventana anterior.
+    """
+    if slices < 2 or start is None or end is None or end <= start:
+        return [(None, None)]
+    step = (end - start) / slices
+    bounds = [start + step * i for i in range(1, slices)]
+    windows = []
+    for i in range(slices):
+        from_date = bounds[i - 1] - timedelta(seconds=1) if i > 0 else None
+        to_date = bounds[i] if i < slices - 1 else None
+        windows.append((from_date, to_date))
+    return windows[::-1]
+
+
+def _window_params(branch, from_date, to_date):
+    params = {**_branch_criteria(branch), "$top": 5000}
+    # Las ventanas se solapan un segundo: los repetidos del borde se descartan al unir
+    if from_date is not None:
+        params["searchCriteria.fromDate"] = _format_date(from_date)
+    if to_date is not None:
+        params["searchCriteria.toDate"] = _format_date(to_date)
+    return params
+
+
+def _fetch_window(repo_id, branch, from_date, to_date):
+    """Todos los commits [(commitId, parents)] de una ventana, siguiendo su continuationToken."""
+    session = http_client.session()
+    params = _window_params(branch, from_date, to_date)
+    url = repo_inventory.azure_repo_url(repo_id, "commits")
+    commits = []
+    while True:
+        resp = rate_limit.get(session, url, params=params, auth=_AZ_AUTH, timeout=60)
+        if resp.status_code == 404:
+            return commits
+        resp.raise_for_status()
+        commits.extend((c["commitId"], c.get("parents")) for c in resp.json().get("value", []))
+        continuation = resp.headers.get("x-ms-continuationtoken")
+        if not continuation:
+            return commits
+        params["continuationToken"] = continuation
+
+
+async def _fetch_window_async(engine, repo_id, branch, from_date, to_date):
+    commits = []
+    async for data in engine.azure_pages(repo_inventory.azure_repo_url(repo_id, "commits"),
+                                         params=_window_params(branch, from_date, to_date), auth=_AZ_AUTH):
+        commits.extend((c["commitId"], c.get("parents")) for c in data.get("value", []))
+    return commits
+
+
+def _window_page(i, n, commits, seen, total):
+    """Commits nuevos de la ventana i (los del borde solapado ya vistos se descartan)."""
+    page = [(sha, parents) for sha, parents in commits if sha not in seen]
+    seen.update(sha for sha, _ in page)
+    print(f"🔎 [AZURE] Ventana {i}/{n}: {len(page)} commits (total: {total + len(page)})")
+    return page
+
+
+def iter_sliced_pages(repo_id, branch, slices=AZURE_COMMIT_SLICES, workers=MAX_WORKERS):
+    """
+    Historial de una rama por ventanas de fecha en paralelo. Produce primero el tip
+    (para que el store lo reconozca) y luego una página por ventana, de la más nueva a
+    la más vieja, sin commits repetidos.
+    """
+    session = http_client.session()
+    tip = _edge_commit(session, repo_id, branch, oldest=False)
+    if tip is None:
+        return
+    oldest = _edge_commit(session, repo_id, branch, oldest=True)
+
+    seen = {tip["commitId"]}
+    yield [(tip["commitId"], tip.get("parents"))]
+
+    windows = date_windows(_committer_date(oldest), _committer_date(tip), slices)
+    total = 1
+    ex = ThreadPoolExecutor(max_workers=max(1, min(workers, len(windows))))
+    try:
+        futures = [ex.submit(_fetch_window, repo_id, branch, f, t) for f, t in windows]
+        for i, fut in enumerate(futures, start=1):
+            page = _window_page(i, len(windows), fut.result(), seen, total)
+            total += len(page)
+            if page:   # una página vacía el store la toma como fin del historial
+                yield page
+    finally:
+        # Cierre anticipado (store completo): las ventanas pendientes se cancelan
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+async def iter_sliced_pages_async(engine, repo_id, branch, slices=AZURE_COMMIT_SLICES):
+    """Igual que iter_sliced_pages con el motor asyncio: cada ventana es una tarea."""
+    tip = await _edge_commit_async(engine, repo_id, branch, oldest=False)
+    if tip is None:
+        return
+    oldest = await _edge_commit_async(engine, repo_id, branch, oldest=True)
+
+    seen = {tip["commitId"]}
+    yield [(tip["commitId"], tip.get("parents"))]
+
+    windows = date_windows(_committer_date(oldest), _committer_date(tip), slices)
+    total = 1
+    tasks = [asyncio.ensure_future(_fetch_window_async(engine, repo_id, branch, f, t)) for f, t in windows]
+    try:
+        for i, task in enumerate(tasks, start=1):
+            page = _window_page(i, len(windows), await task, seen, total)
+            total += len(page)
+            if page:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class CommitsBatchFetcher:
+    """
+    Historial de las ramas de un repo vía POST commitsbatch:
+
+        fetcher = batch_fetcher(repo_id)
+        for page in fetcher.iter_pages("main"): ...
+        fetcher.stats()  # requests, commits, commits/s
+    """
+
+    def __init__(self, repo_id, page_size=AZURE_BATCH_PAGE):
+        self.repo_id = repo_id
+        self.page_size = page_size
+        self.url = repo_inventory.azure_repo_url(repo_id, "commitsbatch")
+        self._session = http_client.session()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.commits = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.branches = set()
+
+    def _params(self, skip):
+        return {"$skip": skip, "$top": self.page_size, "api-version": "7.1"}
+
+    def _criteria(self, branch):
+        with self._lock:
+            self.branches.add(branch)
+        return {"itemVersion": {"versionType": "branch", "version": branch}}
+
+    def _page(self, resp, elapsed):
+        """Registra la respuesta y devuelve su página; None al final (404 o página vacía)."""
+        with self._lock:
+            self.requests += 1
+            self.seconds += elapsed
+            self.bytes += len(resp.content)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        values = resp.json().get("value", [])
+        with self._lock:
+            self.commits += len(values)
+        return [(c["commitId"], c.get("parents")) for c in values] or None
+
+    def iter_pages(self, branch):
+        """Páginas [(commitId, parents)] de una rama, del tip hacia atrás."""
+        criteria = self._criteria(branch)
+        skip = 0
+        while True:
+            start = time.monotonic()
+            resp = rate_limit.post(self._session, self.url, params=self._params(skip), json=criteria,
+                                   auth=_AZ_AUTH, timeout=60)
+            page = self._page(resp, time.monotonic() - start)
+            if page is None:
+                return
+            yield page
+            # Se corta solo con una página vacía: el servidor puede topar $top por debajo de page_size
+            skip += len(page)
+
+    async def iter_pages_async(self, engine, branch):
+        """Igual que iter_pages con el motor asyncio (mismas métricas)."""
+        criteria = self._criteria(branch)
+        skip = 0
+        while True:
+            start = time.monotonic()
+            resp = await engine.post(self.url, params=self._params(skip), json=criteria, auth=_AZ_AUTH)
+            page = self._page(resp, time.monotonic() - start)
+            if page is None:
+                return
+            yield page
+            skip += len(page)
+
+    def stats(self):
+        with self._lock:
+            rate = self.commits / self.seconds if self.seconds else 0.0
+            return {
+                "branches": len(self.branches),
+                "requests": self.requests,
+                "commits": self.commits,
+                "bytes": self.bytes,
+                "seconds": round(self.seconds, 2),
+                "commits_per_sec": round(rate, 1),
+            }
+
+
+_fetchers = {}
+_fetchers_lock = threading.Lock()
+
+
+def batch_fetcher(repo_id):
+    """Fetcher commitsbatch compartido por todas las ramas de un repo."""
+    with _fetchers_lock:
+        if repo_id not in _fetchers:
+            _fetchers[repo_id] = CommitsBatchFetcher(repo_id)
+        return _fetchers[repo_id]
+
+
+def batch_stats(repo_id):
+    """Métricas del fetcher del repo, o None si no se usó commitsbatch."""
+    with _fetchers_lock:
+        fetcher = _fetchers.get(repo_id)
+    return fetcher.stats() if fetcher else None
@@ -0,0 +1,153 @@
+# commit_graph.py
+"""
+Almacén de commits por repositorio (un store para Azure y otro para GitHub).
+
+Cada commit se guarda una sola vez, indexado por SHA con sus padres. Al cargar una
+rama se consumen páginas del historial SOLO hasta que todos los ancestros del tip
+ya estén en el store: las ramas que comparten historia con otra ya cargada
+terminan tras una o dos páginas en lugar de re-descargar todo.
+
+Los SHAs se guardan en binario (20 bytes; los padres de un commit concatenados en
+un solo bytes) y las ramas se devuelven como arrays S20 de sha_sets: el historial
+de una rama grande no se materializa nunca como strings hex.
+"""
+
+import asyncio
+import threading
+
+import sha_sets
+
+_SHA = sha_sets.SHA_BYTES
+
+
+def _split(parents):
+    """Padres concatenados -> SHAs binarios."""
+    return [parents[i:i + _SHA] for i in range(0, len(parents), _SHA)]
+
+
+class CommitGraphStore:
+
+    def __init__(self, name):
+        self.name = name
+        self._parents = {}          # sha (20 bytes) -> padres concatenados | None si la API no los envió
+        self._tips = {}             # branch -> sha hex del tip
+        self._listed = {}           # branch -> array S20 listado, solo si el grafo quedó incompleto
+        self._lock = threading.Lock()
+        self._async_lock = None     # se crea dentro del event loop que use el store
+        self.pages_fetched = 0
+
+    def __contains__(self, sha):
+        return bytes.fromhex(sha) in self._parents
+
+    def __len__(self):
+        return len(self._parents)
+
+    def _expand(self, pending, visited, unresolved):
+        """Recorre ancestros ya conocidos; los padres que faltan quedan en 'unresolved'."""
+        stack = list(pending)
+        while stack:
+            sha = stack.pop()
+            if sha in visited:
+                continue
+            if sha not in self._parents:
+                unresolved.add(sha)
+                continue
+            unresolved.discard(sha)
+            visited.add(sha)
+            parents = self._parents[sha]
+            if parents is None:
+                # Sin padres no se puede cerrar el grafo: se pagina hasta el final
+                unresolved.add(("?", sha))
+                continue
+            stack.extend(p for p in _split(parents) if p not in visited)
+
+    def _begin(self, branch, tip):
+        """Estado de carga de una rama, o el array final si no hace falta pedir páginas."""
+        if branch in self._tips:
+            return None, self._reachable_locked(branch)
+        state = {"branch": branch, "tip": tip, "visited": set(), "unresolved": set()}
+        if tip:
+            self._expand([bytes.fromhex(tip)], state["visited"], state["unresolved"])
+            if not state["unresolved"]:
+                # El tip y todos sus ancestros ya están: cero requests
+                self._tips[branch] = tip
+                return None, sha_sets.from_bytes(state["visited"])
+        return state, None
+
+    def _feed(self, state, page):
+        """Agrega una página al store. True cuando ya no hacen falta más páginas."""
+        self.pages_fetched += 1
+        visited, unresolved = state["visited"], state["unresolved"]
+        shas = []
+        for sha, parents in page:
+            raw = bytes.fromhex(sha)
+            if self._parents.get(raw) is None:
+                self._parents[raw] = bytes.fromhex("".join(parents)) if parents is not None else None
+            shas.append(raw)
+        if not page:
+            return True
+        if state["tip"] is None:
+            state["tip"] = page[0][0]   # la API lista primero el tip de la rama
+        # Todo SHA listado entra en 'visited': con el grafo incompleto, es el listado mismo
+        self._expand([bytes.fromhex(state["tip"])] + shas, visited, unresolved)
+        # Re-intenta los pendientes que esta página pudo haber traído
+        self._expand([u for u in unresolved if not isinstance(u, tuple)], visited, unresolved)
+        return not unresolved
+
+    def _finish(self, state):
+        self._tips[state["branch"]] = state["tip"]
+        reachable = sha_sets.from_bytes(state["visited"])
+        if state["unresolved"]:
+            # Grafo incompleto (p.ej. API sin 'parents'): el listado es la verdad
+            self._listed[state["branch"]] = reachable
+        return reachable
+
+    def load_branch(self, branch, pages, tip=None):
+        """
+        Consume 'pages' (iterable de listas [(sha, parents), ...], del tip hacia atrás)
+        y devuelve los SHAs alcanzables desde la rama (array S20). Deja de pedir páginas
+        en cuanto la clausura de ancestros del tip está completa dentro del store.
+        """
+        # Un solo fetch a la vez por store: la siguiente rama aprovecha lo ya descargado
+        with self._lock:
+            state, done = self._begin(branch, tip)
+            if state is None:
+                return done
+            for page in pages:
+                if self._feed(state, page):
+                    break
+            return self._finish(state)
+
+    async def load_branch_async(self, branch, pages, tip=None):
+        """Igual que load_branch, pero 'pages' es un iterador asíncrono (motor asyncio)."""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        try:
+            async with self._async_lock:
+                state, done = self._begin(branch, tip)
+                if state is None:
+                    return done
+                async for page in pages:
+                    if self._feed(state, page):
+                        break
+                return self._finish(state)
+        finally:
+            # Corte anticipado, error o rama ya cargada: el generador cancela lo que tenga en vuelo
+            await pages.aclose()
+
+    def _reachable_locked(self, branch):
+        tip = self._tips.get(branch)
+        visited, unresolved = set(), set()
+        if tip:
+            self._expand([bytes.fromhex(tip)], visited, unresolved)
+        reachable = sha_sets.from_bytes(visited)
+        listed = self._listed.get(branch)
+        return reachable if listed is None else sha_sets.union(reachable, listed)
+
+    def reachable(self, branch):
+        """Commits alcanzables desde una rama ya cargada (array S20; vacío si no se cargó)."""
+        with self._lock:
+            return self._reachable_locked(branch)
+
+    def tip(self, branch):
+        return self._tips.get(branch)
@@ -0,0 +1,152 @@
+# commit_report.py
+"""
+Formato del reporte de commits.
+
+COMMITS_REPORT_FORMAT=summary (por defecto): data/commits_comparison.json guarda por
+rama solo conteos (<lista>_count) y una muestra acotada de faltantes/extras
+(<lista>_preview). Las listas completas de SHAs van a un archivo comprimido por repo,
+data/commits/<repo>.json.gz, que se lee solo cuando un detalle lo necesita.
+
+COMMITS_REPORT_FORMAT=full conserva las listas completas dentro del JSON principal.
+
+Al final de la etapa se borran los sidecars de repos que esta corrida ya no escribió,
+y los sidecars leídos se retienen en un LRU de COMMITS_SIDECAR_CACHE repos.
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+COMMITS_REPORT_FORMAT = os.getenv("COMMITS_REPORT_FORMAT", "summary").strip().lower()
+COMMITS_PREVIEW = int(os.getenv("COMMITS_PREVIEW", "20"))
+COMMITS_SIDECAR_CACHE = int(os.getenv("COMMITS_SIDECAR_CACHE", "8"))
+SIDECAR_DIR = os.path.join("data", "commits")
+
+SHA_LISTS = ("shared_commits", "missing_in_github", "extra_in_github")
+_PREVIEW_LISTS = ("missing_in_github", "extra_in_github")
+
+
+def sidecar_path(repo_name):
+    safe = re.sub(r"[^\w.-]", "_", repo_name)
+    return os.path.join(SIDECAR_DIR, f"{safe}.json.gz")
+
+
+def summarize(result):
+    """
+    Separa un resultado de rama en (entrada_resumen, listas_completas).
+    En formato full devuelve el resultado tal cual y None.
+    """
+    if COMMITS_REPORT_FORMAT != "summary" or not any(k in result for k in SHA_LISTS):
+        return result, None
+    entry = {k: v for k, v in result.items() if k not in SHA_LISTS}
+    lists = {}
+    for key in SHA_LISTS:
+        values = result.get(key, [])
+        entry.setdefault(f"{key}_count", len(values))
+        lists[key] = values
+    for key in _PREVIEW_LISTS:
+        entry[f"{key}_preview"] = lists[key][:COMMITS_PREVIEW]
+    return entry, lists
+
+
+def load_sidecar(repo_name):
+    """{ branch_label: {lista: [shas]} } de un repo ({} si no existe)."""
+    path = sidecar_path(repo_name)
+    if not os.path.exists(path):
+        return {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_sidecar_cache = OrderedDict()   # repo -> sidecar; LRU de COMMITS_SIDECAR_CACHE repos
+
+
+def branch_shas(repo_name, branch_entry, key):
+    """
+    Lista completa de SHAs (key en SHA_LISTS) de una rama: inline si el JSON es 'full',
+    si no desde el sidecar del repo (cacheado mientras siga entre los más recientes).
+    """
+    if key in branch_entry:
+        return branch_entry[key]
+    if repo_name in _sidecar_cache:
+        _sidecar_cache.move_to_end(repo_name)
+    else:
+        _sidecar_cache[repo_name] = load_sidecar(repo_name)
+        while len(_sidecar_cache) > max(1, COMMITS_SIDECAR_CACHE):
+            _sidecar_cache.popitem(last=False)
+    return _sidecar_cache[repo_name].get(branch_entry.get("branch"), {}).get(key, [])
+
+
+class SidecarWriter:
+    """
+    Junta las listas de cada rama y escribe el sidecar de un repo en cuanto
+    terminan todas sus ramas (no se retiene la historia de todos los repos).
+    """
+
+    def __init__(self):
+        self._pending = {}    # repo -> ramas que faltan
+        self._buffers = {}    # repo -> {label: listas}
+        self._written = set() # rutas de sidecar escritas en esta corrida
+        self._lock = threading.Lock()
+
+    def expect(self, repo_name, n_branches, carried_labels=()):
+        """Registra un repo; las ramas arrastradas conservan las listas del sidecar anterior."""
+        buffer = {}
+        if carried_labels:
+            previous = load_sidecar(repo_name)
+            buffer = {label: previous[label] for label in carried_labels if label in previous}
+        with self._lock:
+            self._pending[repo_name] = n_branches
+            self._buffers[repo_name] = buffer
+
+    def ready(self, repo_name):
+        """Fin de la planificación de un repo: si no quedan ramas por comparar, se escribe ya."""
+        with self._lock:
+            done = self._pending[repo_name] == 0
+        if done:
+            self._flush(repo_name)
+
+    def put(self, repo_name, label, lists):
+        """Guarda las listas de una rama sin contarla como terminada (p.ej. arrastradas)."""
+        if lists is not None:
+            with self._lock:
+                self._buffers[repo_name][label] = lists
+
+    def add(self, repo_name, label, lists):
+        """Agrega una rama terminada (lists=None si falló o no hubo listado)."""
+        self.put(repo_name, label, lists)
+        with self._lock:
+            self._pending[repo_name] -= 1
+            done = self._pending[repo_name] == 0
+        if done:
+            self._flush(repo_name)
+
+    def _flush(self, repo_name):
+        with self._lock:
+            buffer = self._buffers.pop(repo_name, {})
+        if COMMITS_REPORT_FORMAT != "summary":
+            return
+        os.makedirs(SIDECAR_DIR, exist_ok=True)
+        path = sidecar_path(repo_name)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(buffer, f, separators=(",", ":"))
+        with self._lock:
+            self._written.add(path)
+
+    def prune(self):
+        """Borra los sidecars de repos que esta corrida no escribió (eliminados o sin ramas)."""
+        if not os.path.isdir(SIDECAR_DIR):
+            return
+        with self._lock:
+            written = set(self._written)
+        removed = 0
+        for name in os.listdir(SIDECAR_DIR):
+            path = os.path.join(SIDECAR_DIR, name)
+            if name.endswith(".json.gz") and path not in written:
+                os.remove(path)
+                removed += 1
+        if removed:
+            print(f"🧹 {removed} sidecars de commits obsoletos eliminados de {SIDECAR_DIR}")
@@ -0,0 +1,192 @@
+# git_mirror.py
+"""
+Backend de verificación sobre mirrors locales (VERIFY_BACKEND=mirror).
+
+Para repos con historiales de cientos de miles de commits, paginar las APIs no
+escala. Se mantiene un repo bare por repo emparejado en MIRROR_CACHE_DIR con dos
+remotos espejados en namespaces separados:
+
+    azure  -> refs/azure/heads/*,  refs/azure/tags/*
+    github -> refs/github/heads/*, refs/github/tags/*
+
+La primera corrida clona; las siguientes son fetch incrementales (solo el delta).
+Ambos lados comparten el almacén de objetos, así que lo que GitHub ya trajo de
+Azure no se descarga dos veces. Ramas y commits se calculan localmente con
+for-each-ref y rev-list (solo la diferencia entre lados, con --not, y el conteo de
+comunes con --count), con la misma forma de JSON que las etapas por API.
+"""
+
+import base64
+import os
+import re
+import subprocess
+import threading
+import time
+
+import git_refs
+from config import GITHUB_TOKEN, AZURE_TOKEN
+
+VERIFY_BACKEND = os.getenv("VERIFY_BACKEND", "api").strip().lower()   # api | mirror
+MIRROR_CACHE_DIR = os.getenv("MIRROR_CACHE_DIR", os.path.join(".cache", "mirrors"))
+MIRROR_FETCH_TIMEOUT = int(os.getenv("MIRROR_FETCH_TIMEOUT", "3600"))
+
+SIDES = ("azure", "github")
+_AUTH = {"azure": ("", AZURE_TOKEN), "github": ("x-access-token", GITHUB_TOKEN)}
+
+
+def enabled():
+    return VERIFY_BACKEND == "mirror"
+
+
+def _auth_env(auth):
+    """
+    Credenciales por variables de entorno (GIT_CONFIG_*): no quedan en la config
+    del mirror ni en la línea de comandos.
+    """
+    user, token = auth
+    basic = base64.b64encode(f"{user}:{token or ''}".encode()).decode()
+    return {
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+    }
+
+
+class Mirror:
+    """Repo bare local con los refs de Azure y GitHub de un repo emparejado."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def git(self, *args, env=None, timeout=None, input=None):
+        proc = subprocess.run(
+            ["git", "-C", self.path, *args], capture_output=True, text=True,
+            env={**os.environ, **(env or {})}, timeout=timeout, input=input,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"git {args[0]} ({self.path}): {proc.stderr.strip()}")
+        return proc.stdout
+
+    def configure(self, remotes):
+        """Crea el repo bare (si falta) y apunta cada remoto a {side: url}."""
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+            self.git("init", "--quiet", "--bare")
+        for side, url in remotes.items():
+            self.git("config", f"remote.{side}.url", url)
+            self.git("config", "--replace-all", f"remote.{side}.fetch", f"+refs/heads/*:refs/{side}/heads/*")
+            self.git("config", "--add", f"remote.{side}.fetch", f"+refs/tags/*:refs/{side}/tags/*")
+            self.git("config", f"remote.{side}.tagOpt", "--no-tags")
+
+    def fetch(self, side, auth):
+        self.git("fetch", "--quiet", "--prune", "--no-write-fetch-head", side, env=_auth_env(auth), timeout=MIRROR_FETCH_TIMEOUT)
+
+    def refs(self, side, kind):
+        """{nombre: sha} de refs/<side>/<kind>/* (kind: heads | tags; tags pelados hasta el commit)."""
+        prefix = f"refs/{side}/{kind}/"
+        out = self.git("for-each-ref", "--format=%(objectname) %(objecttype) %(refname)", prefix)
+        tips, annotated = {}, []
+        for line in out.splitlines():
+            sha, objtype, name = line.split(" ", 2)
+            tips[name[len(prefix):]] = sha
+            if objtype == "tag":
+                annotated.append(name)
+        if annotated:
+            # %(*objectname) pela un solo nivel; <ref>^{} pela tags de tags. Un solo proceso para todos
+            out = self.git("cat-file", "--batch-check=%(objectname)",
+                           input="".join(f"{name}^{{}}\n" for name in annotated))
+            for name, peeled in zip(annotated, out.splitlines()):
+                tips[name[len(prefix):]] = peeled
+        return tips
+
+    def _branch_ref(self, side, branch):
+        """refs/<side>/heads/<branch>, o None si la rama no existe en ese lado."""
+        ref = f"refs/{side}/heads/{branch}"
+        try:
+            self.git("rev-parse", "--verify", "--quiet", ref)
+        except RuntimeError:
+            return None
+        return ref
+
+    def rev_list(self, side, branch, exclude=None):
+        """
+        Commits alcanzables desde la rama y no desde 'exclude' = (side, branch) si se pasa
+        (lista vacía si la rama no existe). Con exclude solo se recorre la diferencia.
+        """
+        ref = self._branch_ref(side, branch)
+        if ref is None:
+            return []
+        other = self._branch_ref(*exclude) if exclude else None
+        return self.git("rev-list", ref, *(["--not", other] if other else [])).split()
+
+    def count(self, side, branch):
+        """Cantidad de commits alcanzables desde la rama (0 si no existe)."""
+        ref = self._branch_ref(side, branch)
+        return int(self.git("rev-list", "--count", ref)) if ref else 0
+
+
+# === Un mirror por repo, sincronizado una vez por proceso ===
+
+_lock = threading.Lock()
+_mirrors = {}      # repo_id de Azure -> Mirror ya sincronizado
+_key_locks = {}
+
+
+def mirror_path(azure_repo_id):
+    safe = re.sub(r"[^\w.-]", "_", azure_repo_id)
+    return os.path.join(MIRROR_CACHE_DIR, f"{safe}.git")
+
+
+def _remotes(pair):
+    """{side: url} de un repo emparejado (mismas URLs que git_refs)."""
+    azure_repo, github_repo = pair["azure"], pair["github"]
+    return {
+        "azure": git_refs.azure_remote(azure_repo["repo_id"], azure_repo["repo_name"])[0],
+        "github": git_refs.github_remote(github_repo["owner"], github_repo["repo"])[0],
+    }
+
+
+def _sync(azure_repo_id, remotes):
+    """
+    Configura (si hay remotos) y actualiza ambos lados. Van en serie a propósito: el
+    fetch de GitHub negocia contra los objetos que ya trajo Azure y baja solo la diferencia.
+    """
+    mirror = Mirror(mirror_path(azure_repo_id))
+    first = not os.path.isdir(mirror.path)
+    if remotes:
+        mirror.configure(remotes)
+    elif first:
+        # Etapa suelta sin pair: solo se reusan mirrors ya configurados
+        raise RuntimeError(f"No hay mirror para {azure_repo_id}: falta la etapa de branches")
+    start = time.monotonic()
+    for side in SIDES:
+        mirror.fetch(side, _AUTH[side])
+    print(f"🪞 Mirror {mirror.path}: {'clon inicial' if first else 'fetch incremental'} "
+          f"en {time.monotonic() - start:.1f}s")
+    return mirror
+
+
+def _memo(azure_repo_id, remotes):
+    with _lock:
+        if azure_repo_id in _mirrors:
+            return _mirrors[azure_repo_id]
+        key_lock = _key_locks.setdefault(azure_repo_id, threading.Lock())
+    with key_lock:
+        with _lock:
+            if azure_repo_id in _mirrors:
+                return _mirrors[azure_repo_id]
+        mirror = _sync(azure_repo_id, remotes)
+        with _lock:
+            _mirrors[azure_repo_id] = mirror
+        return mirror
+
+
+def for_pair(pair):
+    """Mirror del repo emparejado, clonado o actualizado (una vez por proceso)."""
+    return _memo(pair["azure"]["repo_id"], _remotes(pair))
+
+
+def open_mirror(azure_repo_id):
+    """Mirror ya configurado de un repo (lo crea la etapa de branches)."""
+    return _memo(azure_repo_id, None)
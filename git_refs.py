@@ -0,0 +1,156 @@
+# git_refs.py
+"""
+Colector de refs por git smart HTTP (equivalente a `git ls-remote`).
+
+Una sola conversación con cada remoto devuelve todas las refs con su SHA, en lugar
+de paginar la API REST:
+
+  - protocolo v2: GET info/refs con `Git-Protocol: version=2` y, si el servidor
+    anuncia ls-refs, POST git-upload-pack con `command=ls-refs` (peel + ref-prefix)
+  - protocolo v0: la misma respuesta de info/refs ya trae todas las refs; los tags
+    anotados vienen seguidos de su línea `refs/tags/x^{}` (commit pelado)
+
+Con REF_BACKEND=ls-remote, ref_snapshot arma los snapshots con este colector.
+
+GIT_REMOTE_BASE apunta los remotos a otro servidor smart HTTP (p.ej. un
+`git http-backend` local para pruebas): {base}/github/<owner>/<repo>.git y
+{base}/azure/<proyecto>/<repo>.git. Vale también para los mirrors (git_mirror).
+"""
+
+import os
+from urllib.parse import quote
+
+import http_client
+import rate_limit
+import repo_inventory
+from config import GITHUB_TOKEN, AZURE_TOKEN, AZURE_ORG
+
+GIT_REMOTE_BASE = os.getenv("GIT_REMOTE_BASE", "").rstrip("/")
+
+_SERVICE = "git-upload-pack"
+_AGENT = "azuregithubmigration/1.0"
+
+FLUSH = "0000"
+DELIM = "0001"
+
+
+# === pkt-line ===
+
+def pkt_line(text):
+    """Codifica una línea pkt-line (4 dígitos hex de largo, incluyéndose)."""
+    data = text.encode()
+    return f"{len(data) + 4:04x}".encode() + data
+
+
+def iter_pkt_lines(payload):
+    """
+    Itera las pkt-lines de una respuesta: str sin el '\\n' final, o None para los
+    paquetes especiales (flush 0000, delim 0001, response-end 0002).
+    """
+    pos = 0
+    while pos + 4 <= len(payload):
+        length = int(payload[pos:pos + 4], 16)
+        if length < 4:
+            pos += 4
+            yield None
+            continue
+        line = payload[pos + 4:pos + length]
+        pos += length
+        yield line.decode("utf-8", errors="replace").rstrip("\n")
+
+
+# === Parseo ===
+
+def parse_v0_advertisement(lines, refs):
+    """Agrega a refs {ref: [sha, peeled]} las líneas de un anuncio v0."""
+    for line in lines:
+        if line is None or line.startswith("#"):
+            continue
+        sha, _, rest = line.partition(" ")
+        name = rest.split("\0", 1)[0]
+        if name.endswith("^{}"):
+            base = name[:-3]
+            if base in refs:
+                refs[base][1] = sha
+        elif name != "capabilities^{}":
+            refs.setdefault(name, [sha, None])
+    return refs
+
+
+def parse_ls_refs(lines, refs):
+    """Agrega a refs {ref: [sha, peeled]} la respuesta de `ls-refs` (v2)."""
+    for line in lines:
+        if line is None:
+            continue
+        sha, _, rest = line.partition(" ")
+        name, *attrs = rest.split(" ")
+        peeled = next((a[len("peeled:"):] for a in attrs if a.startswith("peeled:")), None)
+        refs.setdefault(name, [sha, peeled])
+    return refs
+
+
+def _v2_capabilities(lines):
+    """Capacidades v2 (sin valor) si el servidor respondió v2; None si es v0."""
+    lines = [line for line in lines if line is not None and not line.startswith("# service=")]
+    if not lines or lines[0] != "version 2":
+        return None
+    return {line.split("=", 1)[0] for line in lines[1:]}
+
+
+# === Remotos ===
+
+def ls_remote(url, auth=None, session=None, prefixes=("refs/heads/", "refs/tags/")):
+    """
+    {ref: (sha, peeled)} de un remoto smart HTTP. peeled es el commit de un tag
+    anotado (None en el resto). Solo refs bajo 'prefixes'.
+    """
+    session = session or http_client.session()
+    url = url.rstrip("/")
+    resp = rate_limit.get(session, f"{url}/info/refs", params={"service": _SERVICE},
+                          headers={"Git-Protocol": "version=2"}, auth=auth, timeout=60)
+    resp.raise_for_status()
+    advertised = list(iter_pkt_lines(resp.content))
+
+    refs = {}
+    caps = _v2_capabilities(advertised)
+    if caps is None:
+        parse_v0_advertisement(advertised, refs)
+    elif "ls-refs" in caps:
+        body = b"".join(
+            [pkt_line("command=ls-refs\n"), pkt_line(f"agent={_AGENT}\n"), DELIM.encode(),
+             pkt_line("peel\n")]
+            + [pkt_line(f"ref-prefix {p}\n") for p in prefixes]
+            + [FLUSH.encode()]
+        )
+        resp = rate_limit.post(
+            session, f"{url}/{_SERVICE}", data=body, auth=auth, timeout=60,
+            headers={
+                "Git-Protocol": "version=2",
+                "Content-Type": f"application/x-{_SERVICE}-request",
+                "Accept": f"application/x-{_SERVICE}-result",
+            },
+        )
+        resp.raise_for_status()
+        parse_ls_refs(iter_pkt_lines(resp.content), refs)
+    else:
+        raise RuntimeError(f"{url}: el servidor habla protocolo v2 sin ls-refs")
+
+    return {name: tuple(v) for name, v in refs.items() if name.startswith(tuple(prefixes))}
+
+
+def _auth(user, token):
+    # Sin token (servidor local) no se manda Authorization
+    return (user, token) if token else None
+
+
+def github_remote(owner, repo):
+    if GIT_REMOTE_BASE:
+        return f"{GIT_REMOTE_BASE}/github/{owner}/{repo}.git", _auth("x-access-token", GITHUB_TOKEN)
+    return f"https://github.com/{owner}/{repo}.git", _auth("x-access-token", GITHUB_TOKEN)
+
+
+def azure_remote(repo_id, repo_name):
+    project = repo_inventory.azure_project(repo_id)
+    if GIT_REMOTE_BASE:
+        return f"{GIT_REMOTE_BASE}/azure/{quote(project)}/{quote(repo_name)}.git", _auth("", AZURE_TOKEN)
+    return f"https://dev.azure.com/{AZURE_ORG}/{quote(project)}/_git/{quote(repo_name)}", _auth("", AZURE_TOKEN)
@@ -0,0 +1,197 @@
+# github_graphql.py
+"""
+Colector GraphQL de GitHub: en UNA consulta con alias trae, para decenas de repos,
+las ramas (con SHA), los tags (SHA del commit, pelando tags anotados) y las entradas
+de .github/workflows de la rama por defecto. Solo se pagina aparte a los repos que
+tienen más de 100 ramas o tags.
+
+Las etapas de branches, tags y workflows consumen el resultado (memoizado en el
+proceso) cuando GITHUB_REFS_BACKEND=graphql; si un repo no vino en la respuesta,
+la etapa usa su llamada REST de siempre.
+"""
+
+import os
+import threading
+
+import http_client
+import rate_limit
+from config import GITHUB_TOKEN
+
+GITHUB_REFS_BACKEND = os.getenv("GITHUB_REFS_BACKEND", "graphql").strip().lower()
+GRAPHQL_BATCH = int(os.getenv("GRAPHQL_BATCH", "25"))
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Tags de tags: se anidan hasta _PEEL_DEPTH niveles para llegar al commit (como peeledObjectId de Azure)
+_PEEL_DEPTH = 5
+
+
+def _peel_fields(depth):
+    if depth == 0:
+        return "oid"
+    return f"oid ... on Tag {{ target {{ {_peel_fields(depth - 1)} }} }}"
+
+
+_REFS_FIELDS = f"""
+      totalCount
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ name target {{ {_peel_fields(_PEEL_DEPTH)} }} }}
+"""
+
+_REPO_FIELDS = f"""
+    defaultBranchRef {{ name }}
+    heads: refs(refPrefix: "refs/heads/", first: 100) {{{_REFS_FIELDS}    }}
+    tags: refs(refPrefix: "refs/tags/", first: 100) {{{_REFS_FIELDS}    }}
+    workflows: object(expression: "HEAD:.github/workflows") {{
+      ... on Tree {{ entries {{ name type oid }} }}
+    }}
+"""
+
+_PAGE_QUERY = f"""
+query($owner: String!, $name: String!, $prefix: String!, $after: String) {{
+  repository(owner: $owner, name: $name) {{
+    refs(refPrefix: $prefix, first: 100, after: $after) {{{_REFS_FIELDS}    }}
+  }}
+}}
+"""
+
+_lock = threading.Lock()    # solo protege los dicts: ningún request se hace con el lock tomado
+_collected = {}     # (owner, repo) -> dict con branches/tags/workflows
+_attempted = set()  # (owner, repo) ya pedidos (aunque no hayan venido)
+_inflight = {}      # (owner, repo) -> Event del lote que lo está trayendo
+calls = 0
+
+
+def enabled():
+    return GITHUB_REFS_BACKEND == "graphql"
+
+
+def _post(session, query, variables):
+    global calls
+    resp = rate_limit.post(
+        session,
+        GRAPHQL_URL,
+        json={"query": query, "variables": variables},
+        headers={"Authorization": f"bearer {GITHUB_TOKEN}"},
+        timeout=120,
+    )
+    resp.raise_for_status()
+    with _lock:
+        calls += 1
+    payload = resp.json()
+    # Repos inexistentes vienen como null + 'errors' (NOT_FOUND): no es fatal
+    if payload.get("data") is None:
+        raise RuntimeError(f"GraphQL sin datos: {payload.get('errors')}")
+    return payload["data"]
+
+
+def _ref_sha(node):
+    target = node.get("target") or {}
+    # Tag anotado -> commit al que apunta (mismo SHA que /tags en REST), pelando tags de tags
+    while target.get("target"):
+        target = target["target"]
+    return target.get("oid")
+
+
+def _rest_of_refs(session, owner, name, prefix, connection):
+    """Pagina solo los repos que desbordan las primeras 100 refs. Devuelve los nodos."""
+    nodes = list(connection.get("nodes", []))
+    page = connection.get("pageInfo", {})
+    while page.get("hasNextPage"):
+        data = _post(session, _PAGE_QUERY, {
+            "owner": owner, "name": name, "prefix": prefix, "after": page.get("endCursor"),
+        })
+        conn = (data.get("repository") or {}).get("refs") or {}
+        nodes.extend(conn.get("nodes", []))
+        page = conn.get("pageInfo", {})
+    return nodes
+
+
+def _collect_batch(session, owner, names):
+    params = ", ".join(f"$n{i}: String!" for i in range(len(names)))
+    body = "\n".join(
+        f"  r{i}: repository(owner: $owner, name: $n{i}) {{{_REPO_FIELDS}  }}" for i in range(len(names))
+    )
+    query = f"query($owner: String!, {params}) {{\n{body}\n}}"
+    variables = {"owner": owner, **{f"n{i}": n for i, n in enumerate(names)}}
+    data = _post(session, query, variables)
+
+    out = {}
+    for i, name in enumerate(names):
+        repo = data.get(f"r{i}")
+        if not repo:
+            continue
+        tree = repo.get("workflows")
+        heads = _rest_of_refs(session, owner, name, "refs/heads/", repo["heads"])
+        tags = _rest_of_refs(session, owner, name, "refs/tags/", repo["tags"])
+        out[name] = {
+            "default_branch": (repo.get("defaultBranchRef") or {}).get("name"),
+            "branches": {n["name"]: _ref_sha(n) for n in heads},
+            "tags": {n["name"]: _ref_sha(n) for n in tags},
+            # SHA de la ref (objeto tag si es anotado) y commit pelado, por tag
+            "tag_refs": {n["name"]: ((n.get("target") or {}).get("oid"), _ref_sha(n)) for n in tags},
+            # None = no existe .github/workflows en la rama por defecto
+            "workflows": None if tree is None else [
+                {"name": e["name"], "type": e["type"], "oid": e["oid"]} for e in tree.get("entries", [])
+            ],
+        }
+    return out
+
+
+def prefetch(owner, repo_names):
+    """Trae en lotes de GRAPHQL_BATCH todos los repos aún no pedidos de este owner."""
+    done = threading.Event()
+    with _lock:
+        pending = [n for n in dict.fromkeys(repo_names) if (owner, n) not in _attempted]
+        _attempted.update((owner, n) for n in pending)
+        for n in pending:
+            _inflight[(owner, n)] = done
+    if not pending:
+        return
+    session = http_client.session()
+    try:
+        for i in range(0, len(pending), GRAPHQL_BATCH):
+            batch = pending[i:i + GRAPHQL_BATCH]
+            try:
+                result = _collect_batch(session, owner, batch)
+            except Exception as e:
+                print(f"⚠️  [GITHUB-graphql] Lote de {len(batch)} repos falló ({e}); se usará REST.")
+                continue
+            with _lock:
+                for name, info in result.items():
+                    _collected[(owner, name)] = info
+    finally:
+        with _lock:
+            for n in pending:
+                _inflight.pop((owner, n), None)
+        done.set()
+    print(f"🔎 [GITHUB-graphql] {len(pending)} repos en {calls} consultas acumuladas")
+
+
+def prefetch_pairs(matched_repos):
+    """Prefetch de todos los repos de GitHub emparejados, agrupados por owner."""
+    if not enabled():
+        return
+    by_owner = {}
+    for pair in matched_repos:
+        gh = pair["github"]
+        by_owner.setdefault(gh["owner"], []).append(gh["repo"])
+    for owner, names in by_owner.items():
+        prefetch(owner, names)
+
+
+def get(owner, repo_name):
+    """Resultado colectado para un repo, o None si hay que caer a REST."""
+    if not enabled():
+        return None
+    key = (owner, repo_name)
+    with _lock:
+        if key in _collected:
+            return _collected[key]
+        done = _inflight.get(key)
+        attempted = key in _attempted
+    if done is not None:
+        # Otro hilo lo está trayendo en su lote: se espera ese lote, no todos
+        done.wait()
+    elif not attempted:
+        prefetch(owner, [repo_name])
+    return _collected.get(key)
@@ -0,0 +1,109 @@
+# github_pages.py
+"""
+Paginación concurrente de la API REST de GitHub.
+
+La primera página trae en el header Link el rel="last" (número de la última página);
+con eso las páginas 2..N se piden en paralelo en lugar de seguir rel="next" una a una,
+y no hace falta pedir la página vacía del final. Sin rel="last" se sigue rel="next";
+sin ninguno de los dos era una sola página.
+
+iter_pages() entrega las páginas en orden con una ventana deslizante de requests en
+vuelo: si el consumidor deja de iterar (p.ej. el store de commits ya cerró la
+historia) solo se desperdician las páginas de la ventana.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import requests
+
+from http_cache import cached_get
+import http_client
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+
+
+def parse_link_header(link_header):
+    """{rel: url} del header Link de GitHub."""
+    links = {}
+    for part in (link_header or "").split(","):
+        segs = part.split(";")
+        if len(segs) < 2:
+            continue
+        url = segs[0].strip().strip("<>")
+        for seg in segs[1:]:
+            seg = seg.strip()
+            if seg.startswith("rel="):
+                links[seg[4:].strip('"')] = url
+    return links
+
+
+def last_page(link_header):
+    """Número de la última página (rel="last"), o None si no hay más páginas."""
+    last = parse_link_header(link_header).get("last")
+    if not last:
+        return None
+    values = parse_qs(urlparse(last).query).get("page")
+    return int(values[0]) if values else None
+
+
+def with_page(url, page):
+    """Misma URL con ?page=N (reemplaza el que tuviera)."""
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def iter_pages(url, params=None, headers=None, session=None, window=MAX_WORKERS, ok_missing=(404,)):
+    """
+    Itera las respuestas JSON de todas las páginas, en orden. La primera define
+    cuántas hay; el resto se pide en paralelo, con a lo sumo 'window' en vuelo.
+    """
+    session = session or http_client.session()
+    first = cached_get(session, url, params=params, headers=headers)
+    if first.status_code in ok_missing:
+        return
+    first.raise_for_status()
+    yield first.json()
+
+    links = parse_link_header(first.headers.get("Link"))
+    last = last_page(first.headers.get("Link"))
+    if not last:
+        # Sin rel="last" pero con rel="next": se sigue la cadena de a una
+        next_url = links.get("next")
+        while next_url:
+            resp = cached_get(session, next_url, headers=headers)
+            resp.raise_for_status()
+            yield resp.json()
+            next_url = parse_link_header(resp.headers.get("Link")).get("next")
+        return
+
+    # La URL final de la primera página ya trae los query params
+    base = first.url or requests.Request("GET", url, params=params).prepare().url
+
+    def fetch(page):
+        resp = cached_get(session, with_page(base, page), headers=headers)
+        resp.raise_for_status()
+        return resp.json()
+
+    ex = ThreadPoolExecutor(max_workers=max(1, min(window, last - 1)))
+    in_flight = deque()
+    next_page = 2
+    try:
+        while next_page <= last or in_flight:
+            while next_page <= last and len(in_flight) < window:
+                in_flight.append(ex.submit(fetch, next_page))
+                next_page += 1
+            yield in_flight.popleft().result()
+    finally:
+        # Cierre anticipado: las páginas que aún no salieron se cancelan
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_pages(url, params=None, headers=None, session=None, workers=MAX_WORKERS, ok_missing=(404,)):
+    """Lista de respuestas JSON de todas las páginas, en orden (ver iter_pages)."""
+    return list(iter_pages(url, params=params, headers=headers, session=session,
+                           window=workers, ok_missing=ok_missing))
@@ -0,0 +1,217 @@
+# http_cache.py
+"""
+Caché HTTP en disco con peticiones condicionales (ETag / If-None-Match,
+Last-Modified / If-Modified-Since) para las llamadas GET a GitHub.
+
+Las respuestas 304 no consumen rate limit: el cuerpo se sirve desde disco.
+La llave es la URL más la credencial (header Authorization o auth=(usuario, PAT) de
+Azure): credenciales distintas nunca comparten entradas.
+Tamaño acotado por HTTP_CACHE_MAX_MB con expulsión LRU (orden por último uso).
+Un 404/410 del servidor borra la entrada: un recurso eliminado no se sirve desde disco.
+El motor asyncio usa la misma caché (cached_get_async).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import rate_limit
+import http_client
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "512"))
+
+# Headers que no aplican al cuerpo ya decodificado que guardamos
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class HttpCache:
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> tamaño en bytes (orden = LRU, más viejo primero)
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _load_index(self):
+        """Reconstruye el orden LRU desde los archivos .meta (mtime = último uso)."""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".meta"):
+                continue
+            key = name[:-len(".meta")]
+            body = self._path(key, "body")
+            if not os.path.exists(body):
+                continue
+            found.append((os.path.getmtime(self._path(key, "meta")), key, os.path.getsize(body)))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+
+    @staticmethod
+    def _key(url, headers, auth=None):
+        # La credencial forma parte de la llave: distintos tokens pueden ver datos distintos
+        token = (headers or {}).get("Authorization", "")
+        raw = f"GET {url}\n{token}"
+        if isinstance(auth, (tuple, list)):
+            raw += "\n" + "\0".join(auth)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _read(self, key):
+        try:
+            with open(self._path(key, "meta"), "r") as f:
+                meta = json.load(f)
+            with open(self._path(key, "body"), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _touch(self, key):
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key, "meta"))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        size = self._entries.pop(key, 0)
+        self._total -= size
+        for ext in ("meta", "body"):
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
+
+    def _store(self, key, response):
+        meta = {
+            "url": str(response.url),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+        }
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        with open(self._path(key, "body"), "wb") as f:
+            f.write(body)
+        with open(self._path(key, "meta"), "w") as f:
+            json.dump(meta, f)
+        if key in self._entries:
+            self._total -= self._entries[key]
+        self._entries[key] = len(body)
+        self._entries.move_to_end(key)
+        self._total += len(body)
+        # Expulsión LRU hasta respetar el tope
+        while self._total > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    @staticmethod
+    def _from_cache(meta, body, revalidation):
+        """Arma un requests.Response 200 con el cuerpo en disco y los headers frescos del 304."""
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = body
+        headers = CaseInsensitiveDict(meta.get("headers", {}))
+        for k, v in revalidation.headers.items():
+            if k.lower() not in _DROP_HEADERS:
+                headers[k] = v
+        resp.headers = headers
+        resp.url = meta.get("url") or str(revalidation.url)
+        resp.request = revalidation.request
+        resp.encoding = "utf-8"
+        resp.from_cache = True
+        return resp
+
+    def _begin(self, url, params, headers, auth=None):
+        """(url completa, llave, meta, cuerpo, headers condicionales) de un GET."""
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = self._key(full_url, headers, auth)
+
+        with self._lock:
+            meta, body = self._read(key) if key in self._entries else (None, None)
+
+        req_headers = dict(headers or {})
+        if meta:
+            if meta.get("etag"):
+                req_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                req_headers["If-Modified-Since"] = meta["last_modified"]
+        return full_url, key, meta, body, req_headers
+
+    def get(self, session, url, params=None, headers=None, **kwargs):
+        full_url, key, meta, body, req_headers = self._begin(url, params, headers, kwargs.get("auth"))
+        response = rate_limit.get(session, full_url, headers=req_headers, **kwargs)
+        return self._finish(key, meta, body, response)
+
+    async def get_async(self, fetch, url, params=None, headers=None, auth=None):
+        """
+        Igual que get, con 'fetch(url, params, headers)' asíncrono; el disco se toca en un
+        hilo. 'auth' es la credencial que usa fetch (solo para la llave).
+        """
+        full_url, key, meta, body, req_headers = await asyncio.to_thread(self._begin, url, params, headers, auth)
+        response = await fetch(full_url, None, req_headers)
+        return await asyncio.to_thread(self._finish, key, meta, body, response)
+
+    def _finish(self, key, meta, body, response):
+        """Sirve el 304 desde disco, guarda la respuesta nueva o expulsa un recurso que ya no existe."""
+        with self._lock:
+            if response.status_code == 304 and meta is not None:
+                self.hits += 1
+                self._touch(key)
+                return self._from_cache(meta, body, response)
+            self.misses += 1
+            if response.status_code in (404, 410):
+                self._remove(key)
+            elif response.status_code == 200 and (
+                response.headers.get("ETag") or response.headers.get("Last-Modified")
+            ):
+                self._store(key, response)
+        return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
+
+
+def cached_get(session, url, params=None, headers=None, **kwargs):
+    """
+    GET condicional con caché en disco. 'session' puede ser una requests.Session
+    o el módulo requests. Si HTTP_CACHE=0, es un GET normal.
+    """
+    session = session or http_client.session()
+    if not HTTP_CACHE_ENABLED:
+        return rate_limit.get(session, url, params=params, headers=headers, **kwargs)
+    return get_cache().get(session, url, params=params, headers=headers, **kwargs)
+
+
+async def cached_get_async(fetch, url, params=None, headers=None, auth=None):
+    """cached_get para el motor asyncio: 'fetch(url, params, headers)' hace el GET real."""
+    if not HTTP_CACHE_ENABLED:
+        return await fetch(url, params, headers)
+    cache = await asyncio.to_thread(get_cache)
+    return await cache.get_async(fetch, url, params=params, headers=headers, auth=auth)
@@ -0,0 +1,89 @@
+# http_client.py
+"""
+Sesión HTTP compartida por todo el proceso (fetchers por hilos).
+
+- Pool de conexiones por host de HTTP_POOL_SIZE conexiones: keep-alive entre requests
+  y entre hilos, sin pagar TCP+TLS en cada llamada. La concurrencia es anidada (cada
+  uno de los MAX_WORKERS hilos puede tener GITHUB_COMMIT_PAGE_WINDOW páginas en vuelo),
+  así que el tamaño por defecto es el producto; si aun así se llena, las requests
+  esperan una conexión libre (pool_block) en lugar de abrir y descartar conexiones.
+- Timeout por defecto (HTTP_CONNECT_TIMEOUT / HTTP_TIMEOUT) en toda request que no
+  traiga el suyo.
+- Reintentos con backoff exponencial y jitter (HTTP_RETRIES, HTTP_BACKOFF) para
+  GET/HEAD ante errores de conexión y 500/502/503/504. Los POST no se reintentan.
+  El motor asyncio (async_http) aplica la misma política con jitter_backoff.
+
+El throttling (429 / 403 por cuota) no se reintenta acá: lo maneja rate_limit,
+que comparte el bucket por host con el resto de los fetchers.
+"""
+
+import os
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+GITHUB_COMMIT_PAGE_WINDOW = int(os.getenv("GITHUB_COMMIT_PAGE_WINDOW", "4"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(MAX_WORKERS * GITHUB_COMMIT_PAGE_WINDOW)))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class _JitterRetry(Retry):
+    """Backoff exponencial con jitter completo: espera al azar entre 0 y el backoff."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+class _Session(requests.Session):
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def jitter_backoff(attempt):
+    """Espera antes del reintento número attempt+1: al azar entre 0 y HTTP_BACKOFF * 2^attempt."""
+    return random.uniform(0, HTTP_BACKOFF * 2 ** attempt)
+
+
+def retry_policy():
+    return _JitterRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        # Agotados los reintentos se devuelve la última respuesta (raise_for_status decide)
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+
+
+def new_session():
+    s = _Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=HTTP_POOL_SIZE, pool_block=True,
+                          max_retries=retry_policy())
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+_lock = threading.Lock()
+_session = None
+
+
+def session():
+    """Sesión del proceso (se crea la primera vez)."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = new_session()
+        return _session
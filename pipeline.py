@@ -0,0 +1,286 @@
+# pipeline.py
+"""
+Runner en proceso de las etapas de certificación, modelado como grafo de dependencias:
+
+    repos ──┬──> [lote GraphQL] ──┬──> branches(repo) ──┬──> commits(repo, rama) ──> history(repo, rama)
+            │                     │                     └──> content(repo, rama)...
+            │                     ├──> tags(repo)
+            │                     └──> workflows(repo)
+
+Un solo pool de MAX_WORKERS hilos ejecuta las tareas de todas las etapas y el hilo
+principal despacha las dependientes apenas llega cada resultado: los commits de un
+repo arrancan cuando están sus ramas, y tags/workflows corren en paralelo con ambos.
+Las ramas que no se prueban por tip/ancestro pasan a 'history', con UNA carga de
+historial en vuelo por repo (las demás ramas del repo esperan en cola, sin ocupar hilos
+bloqueados en el lock del store).
+Al final se escriben los mismos data/*.json que las etapas de pytest
+(STAGE_RUNNER=pytest en run_all.py conserva el modo por etapas).
+
+Este runner usa siempre el motor por hilos: HTTP_ENGINE=async solo aplica a las
+etapas sueltas (STAGE_RUNNER=pytest en run_all.py, o cada tests/test_*.py por su
+cuenta). Si viene seteado, run() lo avisa y sigue con hilos.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests"))
+
+import async_http
+import commit_report
+import github_graphql
+import ref_tips
+import test_branches
+import test_commits
+import test_content
+import test_repository
+import test_tags
+import test_workflows
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+
+
+class StageGraph:
+    """
+    Pool compartido + cola de terminaciones. Solo el hilo principal llama a submit()
+    (mientras itera completed()), así que el contador de pendientes no necesita lock.
+    """
+
+    def __init__(self, workers=MAX_WORKERS):
+        self._ex = ThreadPoolExecutor(max_workers=workers)
+        self._done = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self.timings = {}   # etapa -> [primer inicio, último fin] (segundos desde el arranque)
+        self.tasks = {}     # etapa -> tareas ejecutadas
+
+    def submit(self, stage, key, fn, *args):
+        self._pending += 1
+        fut = self._ex.submit(self._timed, stage, fn, *args)
+        fut.add_done_callback(lambda f: self._done.put((stage, key, f)))
+
+    def _timed(self, stage, fn, *args):
+        start = time.monotonic() - self._t0
+        try:
+            return fn(*args)
+        finally:
+            end = time.monotonic() - self._t0
+            with self._lock:
+                span = self.timings.setdefault(stage, [start, end])
+                span[0], span[1] = min(span[0], start), max(span[1], end)
+                self.tasks[stage] = self.tasks.get(stage, 0) + 1
+
+    def completed(self):
+        """Itera (etapa, clave, resultado, error) hasta que no quedan tareas pendientes."""
+        while self._pending:
+            stage, key, fut = self._done.get()
+            self._pending -= 1
+            error = fut.exception()
+            yield stage, key, (None if error else fut.result()), error
+
+    def elapsed(self):
+        return time.monotonic() - self._t0
+
+    def shutdown(self):
+        self._ex.shutdown()
+
+
+def _graphql_batches(matched):
+    """[(owner, [índices])] en lotes de GRAPHQL_BATCH repos del mismo owner."""
+    by_owner = {}
+    for i, pair in enumerate(matched):
+        by_owner.setdefault(pair["github"]["owner"], []).append(i)
+    size = github_graphql.GRAPHQL_BATCH
+    return [
+        (owner, idx[k:k + size])
+        for owner, idx in by_owner.items()
+        for k in range(0, len(idx), size)
+    ]
+
+
+def _dump(name, rows, **kwargs):
+    os.makedirs("data", exist_ok=True)
+    path = os.path.join("data", name)
+    with open(path, "w") as f:
+        json.dump([r for r in rows if r is not None], f, indent=4, **kwargs)
+    print(f"📝 {path}")
+
+
+def run():
+    """Ejecuta todas las etapas y escribe data/*.json. Devuelve los tiempos por etapa."""
+    # Resultados de la corrida anterior: se leen antes de sobrescribir los JSON
+    previous_commits = test_commits.load_previous_commit_results()
+    previous_workflows = test_workflows.load_previous_workflow_results()
+    ref_tips.reset()
+    if async_http.HTTP_ENGINE == "async":
+        print("⚠️ [pipeline] HTTP_ENGINE=async no aplica a este runner: se usa el motor por hilos "
+              "(STAGE_RUNNER=pytest para el motor asyncio).")
+
+    graph = StageGraph()
+    try:
+        return _run(graph, previous_commits, previous_workflows)
+    finally:
+        graph.shutdown()
+
+
+def _run(graph, previous_commits, previous_workflows):
+    repos = test_repository.generate_repo_report()
+    matched = repos["matched"]
+    n = len(matched)
+
+    branches = [None] * n
+    commits = [None] * n
+    tags = [None] * n
+    workflows = [None] * n
+    content = [None] * n
+    plans = {}              # índice -> (repo_result, jobs, az_store, gh_store, sizes)
+    jobs_left = {}          # índice -> ramas de commits aún en vuelo
+    history_waiting = {}    # índice -> [(tamaño, job)] de ramas que necesitan el historial
+    history_busy = set()    # repos con una carga de historial en vuelo
+    fast_left = {}          # índice -> ramas aún en la verificación por tip/ancestro
+    waiting_workflows = set()
+    sidecars = commit_report.SidecarWriter()
+
+    def dispatch_repo(i):
+        pair = matched[i]
+        graph.submit("branches", i, test_branches._process_pair, pair)
+        graph.submit("tags", i, test_tags._compare_tags_pair, pair)
+        # Con resultado anterior, workflows espera las ramas del repo para poder arrastrarlo
+        if ref_tips.INCREMENTAL and pair["github"]["repo"] in previous_workflows:
+            waiting_workflows.add(i)
+        else:
+            graph.submit("workflows", i, test_workflows._check_workflows_pair, pair, previous_workflows)
+
+    def dispatch_commits(i, entry):
+        pair = matched[i]
+        branch_pairs = []
+        if entry is not None:
+            branch_pairs = test_commits._pair_branches_for_commits(
+                entry.get("azure_branches", []), entry.get("github_branches", [])
+            )
+        if branch_pairs:
+            dispatch_content(i, branch_pairs)
+        plan = test_commits.plan_repo_commits(pair, branch_pairs, previous_commits, sidecars)
+        if plan is None:
+            return
+        repo_result, jobs, _, _, sizes = plan
+        commits[i] = repo_result
+        plans[i] = plan
+        jobs_left[i] = len(jobs)
+        fast_left[i] = len(jobs)
+        for job, size in zip(jobs, sizes):
+            graph.submit("commits", (i, job, size), test_commits._compare_fast, *job)
+
+    def submit_history(i):
+        waiting = history_waiting.get(i)
+        if i in history_busy or fast_left[i] or not waiting:
+            return
+        # La rama más grande primero: es la que descarga la historia al store del repo
+        size, job = max(waiting, key=lambda sj: sj[0])
+        waiting.remove((size, job))
+        history_busy.add(i)
+        graph.submit("history", (i, job, size), test_commits._compare_by_history, *job)
+
+    def finish_commit(i, job, res):
+        test_commits._collect_result(commits[i], job, res, sidecars)
+        jobs_left[i] -= 1
+        if jobs_left[i] == 0:
+            _, _, az_store, gh_store, _ = plans.pop(i)
+            test_commits.print_store_stats(commits[i], az_store, gh_store, matched[i]["azure"]["repo_id"])
+
+    def dispatch_content(i, branch_pairs):
+        # Los tips salen del listado que ya hizo la etapa de branches (memoizado)
+        content[i] = test_content.new_repo_entry(matched[i]["azure"]["repo_name"])
+        try:
+            jobs = test_content.plan_content_jobs(matched[i], branch_pairs)
+        except Exception as e:
+            test_content.set_repo_error(content[i], e)
+            return
+        for job in jobs:
+            graph.submit("content", (i, job[1]), test_content._check_branch_content, *job)
+
+    # Lotes GraphQL encadenados: cada lote libera sus repos sin esperar a los demás
+    batches = _graphql_batches(matched) if github_graphql.enabled() else []
+    if batches:
+        owner, idx = batches[0]
+        graph.submit("graphql", 0, github_graphql.prefetch, owner, [matched[i]["github"]["repo"] for i in idx])
+    else:
+        for i in range(n):
+            dispatch_repo(i)
+
+    for stage, key, res, error in graph.completed():
+        if stage == "graphql":
+            for i in batches[key][1]:
+                dispatch_repo(i)
+            if key + 1 < len(batches):
+                owner, idx = batches[key + 1]
+                graph.submit("graphql", key + 1, github_graphql.prefetch,
+                             owner, [matched[i]["github"]["repo"] for i in idx])
+
+        elif stage == "branches":
+            i = key
+            if error is not None:
+                res = {"log": f"⚠️ Error al comparar branches para {matched[i]['azure']['repo_name']}: {error}",
+                       "entry": None}
+            print(res["log"])
+            branches[i] = res["entry"]
+            dispatch_commits(i, res["entry"])
+            if i in waiting_workflows:
+                graph.submit("workflows", i, test_workflows._check_workflows_pair, matched[i], previous_workflows)
+
+        elif stage == "commits":
+            i, job, size = key
+            if error is not None:
+                res = {"ok": False, "log": f"⚠️ Error al comparar branch {job[5]}: {error}"}
+            fast_left[i] -= 1
+            if res is None:
+                # Sin prueba por tip/ancestro: a la cola de historial del repo
+                history_waiting.setdefault(i, []).append((size, job))
+            else:
+                finish_commit(i, job, res)
+            # La cola arranca con todas las ramas del repo ya clasificadas (orden por tamaño)
+            submit_history(i)
+
+        elif stage == "history":
+            i, job, _ = key
+            history_busy.discard(i)
+            if error is not None:
+                res = {"ok": False, "log": f"⚠️ Error al comparar branch {job[5]}: {error}"}
+            finish_commit(i, job, res)
+            submit_history(i)
+
+        elif stage == "content":
+            i, label = key
+            if error is not None:
+                res = {"branch": label, "match": False, "error": str(error)}
+            print(test_content.branch_log(content[i]["repo"], res))
+            test_content.add_branch_result(content[i], res)
+
+        elif stage in ("tags", "workflows"):
+            if error is not None:
+                print(f"⚠️ [{stage}] Error en {matched[key]['azure']['repo_name']}: {error}")
+                continue
+            print(res["log"])
+            (tags if stage == "tags" else workflows)[key] = res["entry"]
+
+    _dump("branches_comparison.json", branches, ensure_ascii=False)
+    _dump("commits_comparison.json", commits)
+    sidecars.prune()
+    _dump("tags_comparison.json", tags)
+    _dump("workflows_check.json", workflows)
+    for entry in content:
+        if entry is not None:
+            entry["branches"].sort(key=lambda b: b["branch"])
+    _dump("content_parity.json", content)
+    ref_tips.flush()
+
+    print(f"\n⏱️  Pipeline: {graph.elapsed():.1f}s en total")
+    for stage, (start, end) in sorted(graph.timings.items(), key=lambda kv: kv[1][0]):
+        print(f"   {stage:<10} {start:7.1f}s → {end:7.1f}s  ({graph.tasks[stage]} tareas)")
+    return graph.timings
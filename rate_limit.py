@@ -0,0 +1,211 @@
+# rate_limit.py
+"""
+Planificador global de requests: un token bucket por (host, recurso), compartido
+por todos los fetchers (hilos y motor asyncio). El recurso es el de
+X-RateLimit-Resource (en GitHub, "core" para REST y "graphql" con cuota por puntos):
+cada cuota tiene su propio bucket y sus headers no se pisan entre sí. Antes de la
+primera respuesta el recurso se deduce de la URL; cuando el header anuncia otro
+(Azure manda p.ej. "ATCP"), se recuerda para ese host y tipo de URL, así la espera
+que se lee al pedir turno es la misma que dejó registrada la respuesta.
+
+No hay pausas fijas: mientras la cuota restante es holgada las requests salen sin
+espera; cuando baja de RATE_LIMIT_LOW_WATERMARK se reparte lo que queda hasta el
+reset. Se leen los headers en vivo:
+  - GitHub:  X-RateLimit-Remaining / X-RateLimit-Reset, Retry-After
+  - Azure:   X-RateLimit-Remaining / X-RateLimit-Reset / X-RateLimit-Delay,
+             x-ms-ratelimit-remaining-*, Retry-After
+Azure solo manda X-RateLimit-* cuando el usuario ya está cerca del límite (sin
+X-RateLimit-Limit): si llegan sin límite conocido, su sola presencia activa el reparto
+de lo que queda, y se levanta cuando dejan de llegar.
+Un 429 (o 403 por rate limit) bloquea el bucket hasta el reset y se reintenta; una
+corrida nunca falla por throttling.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+RATE_LIMIT_LOW_WATERMARK = float(os.getenv("RATE_LIMIT_LOW_WATERMARK", "0.10"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "8"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", os.getenv("MAX_WORKERS", "12")))
+
+
+def _header(headers, name):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers):
+    """Segundos del header Retry-After (número o fecha HTTP)."""
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _resource(url):
+    """Recurso de cuota deducido de la URL (el header X-RateLimit-Resource lo corrige)."""
+    path = urlparse(url).path.rstrip("/")
+    if path.endswith("/graphql"):
+        return "graphql"
+    if path.startswith("/search/code"):
+        return "code_search"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+def _remaining(headers):
+    remaining = _header(headers, "X-RateLimit-Remaining")
+    if remaining is not None:
+        return remaining
+    # Azure/ARM: x-ms-ratelimit-remaining-<scope>; nos quedamos con el más restrictivo
+    values = [
+        _header(headers, k) for k in headers.keys() if k.lower().startswith("x-ms-ratelimit-remaining")
+    ]
+    values = [v for v in values if v is not None]
+    return min(values) if values else None
+
+
+class _HostBucket:
+
+    def __init__(self, burst):
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.rate = None            # tokens/seg; None = sin restricción conocida
+        self.stamp = time.monotonic()
+        self.blocked_until = 0.0
+        self.limit = None
+        self.throttled = 0
+
+    def reserve(self):
+        """Consume un turno y devuelve cuántos segundos hay que esperar para usarlo."""
+        now = time.monotonic()
+        delay = max(0.0, self.blocked_until - now)
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.tokens -= 1
+            if self.tokens < 0:
+                delay = max(delay, -self.tokens / self.rate)
+        self.stamp = now
+        return delay
+
+    def observe(self, status, headers, attempt):
+        """Actualiza el ritmo con los headers. Devuelve segundos a esperar si hay que reintentar."""
+        now_epoch = time.time()
+        remaining = _remaining(headers)
+        reset = _header(headers, "X-RateLimit-Reset")
+        limit = _header(headers, "X-RateLimit-Limit")
+        if limit:
+            self.limit = limit
+        until_reset = max(1.0, reset - now_epoch) if reset else 60.0
+
+        if remaining is not None:
+            # Sin límite conocido (Azure) los headers solo llegan bajo presión: se reparte ya
+            floor = self.limit * RATE_LIMIT_LOW_WATERMARK if self.limit else float("inf")
+            if remaining <= 0:
+                self.blocked_until = time.monotonic() + until_reset
+            elif remaining < floor:
+                # Repartir lo que queda hasta el reset (sin ráfagas mayores a la cuota)
+                self.rate = remaining / until_reset
+                self.tokens = min(self.tokens, remaining - 1)
+            else:
+                self.rate = None
+        elif not self.limit and not _header(headers, "X-RateLimit-Delay"):
+            # Azure dejó de mandar headers de cuota: ya no hay presión
+            self.rate = None
+
+        # Azure avisa que ya está retrasando las requests de este usuario
+        if _header(headers, "X-RateLimit-Delay"):
+            self.rate = max(0.5, (self.rate or float(self.capacity)) / 2)
+
+        throttled = status == 429 or (status == 403 and (remaining == 0 or "Retry-After" in headers))
+        if not throttled:
+            return None
+
+        self.throttled += 1
+        wait = _retry_after(headers)
+        if wait is None:
+            wait = until_reset if remaining == 0 else min(60.0, 2 ** attempt)
+        wait += random.uniform(0, 1)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+        return wait
+
+
+class RequestScheduler:
+
+    def __init__(self, burst=RATE_LIMIT_BURST):
+        self.burst = burst
+        self._buckets = {}
+        self._aliases = {}      # (host, recurso de la URL) -> recurso anunciado por el header
+        self._lock = threading.Lock()
+
+    def _bucket(self, url, headers=None):
+        host, guessed = urlparse(url).netloc, _resource(url)
+        announced = (headers or {}).get("X-RateLimit-Resource")
+        with self._lock:
+            if announced:
+                self._aliases[(host, guessed)] = announced.lower()
+            key = (host, self._aliases.get((host, guessed), guessed))
+            if key not in self._buckets:
+                self._buckets[key] = _HostBucket(self.burst)
+            return self._buckets[key]
+
+    def acquire(self, url):
+        bucket = self._bucket(url)
+        with self._lock:
+            delay = bucket.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url):
+        bucket = self._bucket(url)
+        with self._lock:
+            delay = bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, url, status, headers, attempt=0):
+        bucket = self._bucket(url, headers)
+        with self._lock:
+            return bucket.observe(status, headers, attempt)
+
+    def request(self, session, method, url, **kwargs):
+        """Ejecuta la request respetando el bucket del host; reintenta si hubo throttling."""
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            self.acquire(url)
+            response = session.request(method, url, **kwargs)
+            wait = self.observe(url, response.status_code, response.headers, attempt)
+            if wait is None or attempt == RATE_LIMIT_MAX_RETRIES:
+                return response
+            print(f"⏳ [rate-limit] {urlparse(url).netloc}: {response.status_code}, reintento en {wait:.1f}s")
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {f"{host}/{resource}": b.throttled for (host, resource), b in self._buckets.items()}
+
+
+scheduler = RequestScheduler()
+
+
+def get(session, url, **kwargs):
+    """GET a través del planificador global. 'session' puede ser requests o una Session."""
+    return scheduler.request(session, "GET", url, **kwargs)
+
+
+def post(session, url, **kwargs):
+    return scheduler.request(session, "POST", url, **kwargs)
@@ -0,0 +1,241 @@
+# ref_snapshot.py
+"""
+Snapshot de refs por repo y por lado, armado con UN solo listado sin filtro:
+
+  - Azure DevOps: refs?peelTags=true (heads y tags en las mismas páginas)
+  - GitHub:       lote GraphQL si está disponible; si no, /git/refs paginado
+                  (tags anotados pelados con el listado paginado de /tags, que trae
+                  el commit de cada tag: una llamada por página, no por tag)
+
+Con REF_BACKEND=ls-remote ambos lados se listan por git smart HTTP (git_refs.py):
+una conversación por remoto en lugar de páginas REST.
+
+Cada ref guarda su SHA (target; en tags anotados, el objeto tag) y el commit pelado.
+Las etapas de branches y tags leen del mismo snapshot (memoizado en el proceso):
+la mitad de requests de refs, y los tags salen completos (/tags de REST solo
+devolvía la primera página).
+"""
+
+import asyncio
+import os
+import threading
+
+import git_refs
+import github_graphql
+import github_pages
+import http_client
+import rate_limit
+import repo_inventory
+from config import GITHUB_TOKEN, AZURE_TOKEN
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+REF_BACKEND = os.getenv("REF_BACKEND", "rest").strip().lower()   # rest | ls-remote
+
+_AZ_AUTH = ("", AZURE_TOKEN)
+_GH_HEADERS = {
+    "Authorization": f"token {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+}
+_AZ_PARAMS = {"peelTags": "true", "$top": 5000, "api-version": "7.2-preview.2"}
+
+
+class RefSnapshot:
+    """Heads {nombre: sha} y tags {nombre: (target, peeled)} de un repo en un lado."""
+
+    __slots__ = ("heads", "tags")
+
+    def __init__(self, heads=None, tags=None):
+        self.heads = heads or {}
+        self.tags = tags or {}
+
+    def head_tips(self):
+        return dict(self.heads)
+
+    def tag_tips(self):
+        """{tag: commit} (pelado si el tag es anotado)."""
+        return {name: peeled or target for name, (target, peeled) in self.tags.items()}
+
+    def add_ref(self, ref_name, target, peeled=None):
+        if ref_name.startswith("refs/heads/"):
+            self.heads.setdefault(ref_name[len("refs/heads/"):], target)
+        elif ref_name.startswith("refs/tags/"):
+            self.tags.setdefault(ref_name[len("refs/tags/"):], (target, peeled or target))
+
+
+def from_ls_remote(refs):
+    """Snapshot a partir de {ref: (sha, peeled)} de git_refs.ls_remote."""
+    snap = RefSnapshot()
+    for name, (sha, peeled) in refs.items():
+        snap.add_ref(name, sha, peeled)
+    return snap
+
+
+def _ls_remote_snapshot(label, url, auth, session):
+    snap = from_ls_remote(git_refs.ls_remote(url, auth=auth, session=session))
+    print(f"🔎 [{label}-ls-remote] {len(snap.heads)} branches, {len(snap.tags)} tags")
+    return snap
+
+
+# === Azure DevOps ===
+
+def _azure_from_pages(pages):
+    snap = RefSnapshot()
+    for data in pages:
+        for ref in data.get("value", []):
+            snap.add_ref(ref.get("name", ""), ref.get("objectId"), ref.get("peeledObjectId"))
+    return snap
+
+
+def _azure_pages(session, repo_id):
+    params = dict(_AZ_PARAMS)
+    url = repo_inventory.azure_repo_url(repo_id, "refs")
+    while True:
+        resp = rate_limit.get(session, url, params=params, auth=_AZ_AUTH, timeout=60)
+        resp.raise_for_status()
+        yield resp.json()
+        continuation = resp.headers.get("x-ms-continuationtoken")
+        if not continuation:
+            return
+        params["continuationToken"] = continuation
+
+
+def azure_snapshot(repo_id, session=None, repo_name=None):
+    if REF_BACKEND == "ls-remote" and repo_name:
+        url, auth = git_refs.azure_remote(repo_id, repo_name)
+        return _ls_remote_snapshot("AZURE", url, auth, session)
+    snap = _azure_from_pages(_azure_pages(session or http_client.session(), repo_id))
+    print(f"🔎 [AZURE-refs] {len(snap.heads)} branches, {len(snap.tags)} tags")
+    return snap
+
+
+# === GitHub ===
+
+def _github_from_graphql(gql):
+    tag_refs = gql.get("tag_refs") or {name: (sha, sha) for name, sha in gql["tags"].items()}
+    return RefSnapshot(dict(gql["branches"]), dict(tag_refs))
+
+
+def _refs_url(owner, repo):
+    return f"https://api.github.com/repos/{owner}/{repo}/git/refs"
+
+
+def _tags_url(owner, repo):
+    return f"https://api.github.com/repos/{owner}/{repo}/tags"
+
+
+def _add_git_refs(snap, data, annotated):
+    """Agrega una página de /git/refs; los tags anotados (objeto tag) van a 'annotated'."""
+    for ref in data if isinstance(data, list) else [data]:
+        obj = ref.get("object", {})
+        snap.add_ref(ref.get("ref", ""), obj.get("sha"))
+        if obj.get("type") == "tag":
+            annotated.add(ref["ref"][len("refs/tags/"):])
+
+
+def _apply_peeled(snap, data, annotated):
+    """Pela los tags anotados con una página de /tags (commit final, aunque haya tags de tags)."""
+    for tag in data or []:
+        name = tag.get("name")
+        if name in annotated:
+            snap.tags[name] = (snap.tags[name][0], tag.get("commit", {}).get("sha"))
+
+
+def _github_snapshot_rest(owner, repo, session):
+    snap = RefSnapshot()
+    annotated = set()
+    # 404 = sin permiso / repo inexistente; 409 = repo vacío
+    for data in github_pages.iter_pages(_refs_url(owner, repo), params={"per_page": 100},
+                                        headers=_GH_HEADERS, session=session, ok_missing=(404, 409)):
+        _add_git_refs(snap, data, annotated)
+    if annotated:
+        for data in github_pages.iter_pages(_tags_url(owner, repo), params={"per_page": 100},
+                                            headers=_GH_HEADERS, session=session, ok_missing=(404, 409)):
+            _apply_peeled(snap, data, annotated)
+    return snap
+
+
+def github_snapshot(owner, repo, session=None):
+    if REF_BACKEND == "ls-remote":
+        url, auth = git_refs.github_remote(owner, repo)
+        return _ls_remote_snapshot("GITHUB", url, auth, session)
+    gql = github_graphql.get(owner, repo)
+    if gql is not None:
+        return _github_from_graphql(gql)
+    snap = _github_snapshot_rest(owner, repo, session or http_client.session())
+    print(f"🔎 [GITHUB-refs] {len(snap.heads)} branches, {len(snap.tags)} tags")
+    return snap
+
+
+# === Memo por repo (compartido por las etapas) ===
+
+_lock = threading.Lock()
+_snapshots = {}     # (lado, id) -> RefSnapshot
+_key_locks = {}     # (lado, id) -> Lock: un solo listado aunque dos etapas lo pidan a la vez
+
+
+def _memo(key, build):
+    with _lock:
+        if key in _snapshots:
+            return _snapshots[key]
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            if key in _snapshots:
+                return _snapshots[key]
+        snap = build()
+        with _lock:
+            _snapshots[key] = snap
+        return snap
+
+
+def _cached(key):
+    with _lock:
+        return _snapshots.get(key)
+
+
+def for_pair(pair):
+    """(snapshot Azure, snapshot GitHub) de un repo emparejado."""
+    azure_repo, github_repo = pair["azure"], pair["github"]
+    az = _memo(("azure", azure_repo["repo_id"]),
+               lambda: azure_snapshot(azure_repo["repo_id"], repo_name=azure_repo["repo_name"]))
+    gh = _memo(("github", github_repo["owner"], github_repo["repo"]),
+               lambda: github_snapshot(github_repo["owner"], github_repo["repo"]))
+    return az, gh
+
+
+async def for_pair_async(engine, pair):
+    """Igual que for_pair, con el motor asyncio (los lotes GraphQL ya vienen del prefetch)."""
+    if REF_BACKEND == "ls-remote":
+        # El colector smart HTTP es síncrono: corre en un hilo aparte
+        return await asyncio.to_thread(for_pair, pair)
+    azure_repo, github_repo = pair["azure"], pair["github"]
+    az_key = ("azure", azure_repo["repo_id"])
+    gh_key = ("github", github_repo["owner"], github_repo["repo"])
+
+    az = _cached(az_key)
+    if az is None:
+        pages = [data async for data in engine.azure_pages(
+            repo_inventory.azure_repo_url(azure_repo["repo_id"], "refs"),
+            params=_AZ_PARAMS, auth=_AZ_AUTH, ok_missing=())]
+        az = _memo(az_key, lambda: _azure_from_pages(pages))
+
+    gh = _cached(gh_key)
+    if gh is None:
+        # get() puede esperar un lote GraphQL en vuelo: fuera del event loop
+        gql = await asyncio.to_thread(github_graphql.get, github_repo["owner"], github_repo["repo"])
+        if gql is not None:
+            gh = _memo(gh_key, lambda: _github_from_graphql(gql))
+        else:
+            owner, repo = github_repo["owner"], github_repo["repo"]
+            snap = RefSnapshot()
+            annotated = set()
+            async for data in engine.github_pages(_refs_url(owner, repo), params={"per_page": 100},
+                                                  headers=_GH_HEADERS, ok_missing=(404, 409), window=MAX_WORKERS):
+                _add_git_refs(snap, data, annotated)
+            if annotated:
+                async for data in engine.github_pages(_tags_url(owner, repo), params={"per_page": 100},
+                                                      headers=_GH_HEADERS, ok_missing=(404, 409), window=MAX_WORKERS):
+                    _apply_peeled(snap, data, annotated)
+            gh = _memo(gh_key, lambda: snap)
+    return az, gh
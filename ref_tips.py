@@ -0,0 +1,112 @@
+# ref_tips.py
+"""
+Snapshot de tips (SHA) de branches y tags por repo y por lado, para re-certificación
+incremental.
+
+  data/ref_tips.json           -> tips vistos en la corrida actual (lo escriben las etapas)
+  data/ref_tips_snapshot.json  -> tips de la última corrida completa (lo promueve run_all.py)
+
+Una rama cuyo tip no cambió en Azure ni en GitHub desde el snapshot conserva el
+resultado anterior en data/*.json en lugar de volver a verificarse. Los commits no
+dependen del snapshot: cada resultado guarda los tips contra los que se calculó y se
+compara con los actuales (branch_tips).
+
+Los tips actuales arrancan vacíos en cada proceso: solo cuenta lo que registró esta
+corrida (una etapa suelta sin la de branches no ve tips y recalcula todo), nunca lo
+que quedó en data/ref_tips.json de una corrida anterior.
+
+Estructura: { repo: { "azure": {"heads": {b: sha}, "tags": {t: sha}}, "github": {...} } }
+"""
+
+import json
+import os
+import shutil
+import threading
+
+INCREMENTAL = os.getenv("INCREMENTAL", "1") != "0"
+
+CURRENT_PATH = os.path.join("data", "ref_tips.json")
+SNAPSHOT_PATH = os.path.join("data", "ref_tips_snapshot.json")
+
+_lock = threading.Lock()
+_current = {}
+_previous = None
+_owned = False      # reset() en este proceso: el archivo se reescribe entero
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def previous_tips():
+    """Tips de la última corrida promovida ({} si no existe snapshot)."""
+    global _previous
+    with _lock:
+        if _previous is None:
+            _previous = _load(SNAPSHOT_PATH)
+        return _previous
+
+
+def record(repo, side, kind, tips):
+    """Registra los tips actuales de un repo/lado ('azure'|'github') y tipo ('heads'|'tags')."""
+    with _lock:
+        _current.setdefault(repo, {}).setdefault(side, {})[kind] = dict(tips)
+
+
+def flush():
+    """
+    Escribe data/ref_tips.json con lo registrado. Sin reset() (etapa suelta, p.ej. tags en
+    su propio proceso) se mezcla con el archivo: no se pierden los heads de otra etapa.
+    """
+    with _lock:
+        tips = _current
+        if not _owned:
+            tips = _load(CURRENT_PATH)
+            for repo, sides in _current.items():
+                for side, kinds in sides.items():
+                    tips.setdefault(repo, {}).setdefault(side, {}).update(kinds)
+        os.makedirs("data", exist_ok=True)
+        with open(CURRENT_PATH, "w") as f:
+            json.dump(tips, f, indent=4, ensure_ascii=False)
+
+
+def reset():
+    """Descarta los tips de la corrida anterior: un repo que falle no debe quedar con tips viejos."""
+    global _current, _owned
+    with _lock:
+        _current = {}
+        _owned = True
+
+
+def _tip(tips, repo, side, kind, name):
+    return tips.get(repo, {}).get(side, {}).get(kind, {}).get(name)
+
+
+def branch_tips(repo, az_branch, gh_branch):
+    """(tip Azure, tip GitHub) de la rama en la corrida actual (None si no se registró)."""
+    with _lock:
+        return _tip(_current, repo, "azure", "heads", az_branch), _tip(_current, repo, "github", "heads", gh_branch)
+
+
+def heads_unchanged(repo, side):
+    """True si ninguna rama del lado indicado cambió (ni se creó ni se borró); False sin tips de esta corrida."""
+    prev = previous_tips()
+    with _lock:
+        before = prev.get(repo, {}).get(side, {}).get("heads")
+        now = _current.get(repo, {}).get(side, {}).get("heads")
+        return bool(before) and before == now
+
+
+def promote():
+    """Al terminar una corrida completa, los tips actuales pasan a ser el snapshot."""
+    global _previous
+    with _lock:
+        if os.path.exists(CURRENT_PATH):
+            shutil.copyfile(CURRENT_PATH, SNAPSHOT_PATH)
+        _previous = None
@@ -0,0 +1,144 @@
+# repo_inventory.py
+"""
+Inventario de repositorios en ambos lados.
+
+GitHub: todas las páginas de /orgs/{owner}/repos o /users/{owner}/repos (según el
+tipo de cuenta; GITHUB_OWNER_TYPE=auto|org|user), con las páginas 2..N en paralelo.
+
+Azure DevOps: los repos de cada proyecto de AZURE_PROJECTS (lista separada por comas;
+"*" = todos los proyectos de la organización; por defecto AZURE_PROJECT), un proyecto
+por hilo. Cada repo recuerda su proyecto: azure_repo_url() arma las URLs de las
+etapas con el proyecto correcto.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import github_pages
+import http_client
+import rate_limit
+from config import GITHUB_TOKEN, AZURE_TOKEN, AZURE_ORG, AZURE_PROJECT
+
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+GITHUB_OWNER_TYPE = os.getenv("GITHUB_OWNER_TYPE", "auto").strip().lower()
+AZURE_PROJECTS = os.getenv("AZURE_PROJECTS", "").strip()
+
+_GH_HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+_AZ_AUTH = ("", AZURE_TOKEN)
+
+_lock = threading.Lock()
+_project_by_repo_id = None   # repo_id -> proyecto de Azure
+
+
+# === GitHub ===
+
+def github_owner_type(owner, session=None):
+    """'org' o 'user'. Con GITHUB_OWNER_TYPE=auto se consulta /users/{owner}."""
+    if GITHUB_OWNER_TYPE in ("org", "user"):
+        return GITHUB_OWNER_TYPE
+    resp = rate_limit.get(session or http_client.session(), f"https://api.github.com/users/{owner}", headers=_GH_HEADERS)
+    resp.raise_for_status()
+    return "org" if resp.json().get("type") == "Organization" else "user"
+
+
+def list_github_repos(owner, session=None):
+    """[{repo, owner}] de todas las páginas del owner (org o usuario)."""
+    if github_owner_type(owner, session) == "org":
+        url = f"https://api.github.com/orgs/{owner}/repos"
+        params = {"type": "all", "per_page": 100}
+    else:
+        url = f"https://api.github.com/users/{owner}/repos"
+        params = {"per_page": 100}
+    pages = github_pages.fetch_pages(url, params=params, headers=_GH_HEADERS, session=session, ok_missing=())
+    return [{"repo": r["name"], "owner": owner} for page in pages for r in page]
+
+
+# === Azure DevOps ===
+
+def list_azure_projects(session=None):
+    """Nombres de todos los proyectos de la organización (paginado por continuationToken)."""
+    url = f"https://dev.azure.com/{AZURE_ORG}/_apis/projects"
+    params = {"$top": 500, "api-version": "7.0"}
+    names = []
+    while True:
+        resp = rate_limit.get(session or http_client.session(), url, params=params, auth=_AZ_AUTH)
+        resp.raise_for_status()
+        names.extend(p["name"] for p in resp.json().get("value", []))
+        continuation = resp.headers.get("x-ms-continuationtoken")
+        if not continuation:
+            return names
+        params["continuationToken"] = continuation
+
+
+def azure_projects(session=None):
+    if AZURE_PROJECTS == "*":
+        return list_azure_projects(session)
+    if AZURE_PROJECTS:
+        return [p.strip() for p in AZURE_PROJECTS.split(",") if p.strip()]
+    return [AZURE_PROJECT]
+
+
+def _list_project_repos(project):
+    url = f"https://dev.azure.com/{AZURE_ORG}/{project}/_apis/git/repositories?api-version=7.0"
+    response = rate_limit.get(http_client.session(), url, auth=_AZ_AUTH)
+    response.raise_for_status()
+    return [
+        {"repo_id": r["id"], "repo_name": r["name"], "org": AZURE_ORG, "project": project}
+        for r in response.json()["value"]
+    ]
+
+
+def list_azure_repos(projects=None):
+    """[{repo_id, repo_name, org, project}] de todos los proyectos, un proyecto por hilo."""
+    projects = projects or azure_projects()
+    if not projects:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(projects))) as ex:
+        per_project = list(ex.map(_list_project_repos, projects))
+    repos = [r for rows in per_project for r in rows]
+    register_azure_repos(repos)
+    if len(projects) > 1:
+        print(f"📁 [AZURE] {len(repos)} repos en {len(projects)} proyectos")
+    return repos
+
+
+# === Proyecto de cada repo (para las URLs de las etapas) ===
+
+def register_azure_repos(repos):
+    global _project_by_repo_id
+    with _lock:
+        if _project_by_repo_id is None:
+            _project_by_repo_id = {}
+        for r in repos:
+            _project_by_repo_id[r["repo_id"]] = r.get("project") or AZURE_PROJECT
+
+
+def _load_registry():
+    """En etapas sueltas (pytest por archivo) el inventario sale de data/repos_output.json."""
+    global _project_by_repo_id
+    _project_by_repo_id = {}
+    path = os.path.join("data", "repos_output.json")
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    for r in [p["azure"] for p in data.get("matched", [])] + data.get("only_in_azure", []):
+        _project_by_repo_id[r["repo_id"]] = r.get("project") or AZURE_PROJECT
+
+
+def azure_project(repo_id):
+    with _lock:
+        if _project_by_repo_id is None:
+            _load_registry()
+        return _project_by_repo_id.get(repo_id, AZURE_PROJECT)
+
+
+def azure_repo_url(repo_id, resource=""):
+    """URL base de la API git de un repo de Azure en su proyecto (resource: 'refs', 'commits', ...)."""
+    base = f"https://dev.azure.com/{AZURE_ORG}/{azure_project(repo_id)}/_apis/git/repositories/{repo_id}"
+    return f"{base}/{resource}" if resource else base
@@ -0,0 +1,371 @@
+# report_html.py
+"""
+Generación del reporte HTML (reports/final_report.html y reports/detalles/*.html).
+
+- La página principal se escribe a disco en streaming, fila por fila, sin armar el
+  documento completo en memoria.
+- Las páginas de detalle se renderizan en un pool de procesos (REPORT_WORKERS) y solo
+  se reescriben si cambió el hash de su contenido. Los hijos arrancan con
+  forkserver/spawn (nunca fork: el proceso padre todavía tiene hilos del pipeline y
+  del pool HTTP), reciben solo el nombre de cada repo y leen el modelo de data/.
+- El CSS vive una sola vez en reports/assets/report.css; las páginas solo lo enlazan.
+"""
+
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import commit_report
+from report_model import DATA_DIR, ReportModel, _count
+
+REPORTS_DIR = "reports"
+DETAILS_DIR = os.path.join(REPORTS_DIR, "detalles")
+STYLESHEET = "report.css"
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(os.cpu_count() or 1)))
+
+# Máximo de SHAs faltantes listados por rama en el detalle
+COMMITS_DETAIL_LIMIT = int(os.getenv("COMMITS_DETAIL_LIMIT", "200"))
+
+
+# === helpers para listas con viñetas ===
+def _ul(items):
+    if not items:
+        return "—"
+    return "<ul class='clean'>" + "".join(f"<li>{x}</li>" for x in items) + "</ul>"
+
+def _ul_with_icon(items, icon=""):
+    if not items:
+        return "—"
+    prefix = f"{icon} " if icon else ""
+    return "<ul class='clean'>" + "".join(f"<li>{prefix}{x}</li>" for x in items) + "</ul>"
+
+# === INICIO: función para HTML de detalle individual ===
+def renderiza_detalle_repo_html(row):
+    """HTML de detalle de un repo a partir de su RepoReport (estados ya calculados)."""
+    repo_name = row.repo_name
+    branches, commits, tags, workflows = row.branches, row.commits, row.tags, row.workflows
+    detalle_html = f"""
+    <html>
+    <head>
+        <title>Detalle de Migración: {repo_name}</title>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width,initial-scale=1">
+        <link rel="stylesheet" href="../assets/{STYLESHEET}">
+    </head>
+    <body>
+        <div class="d-header">
+          <a class="back-link" href="../final_report.html">⬅ Volver al reporte principal</a>
+          <div class="d-center">
+            <h1 class="d-title"> Detalle de migración: {repo_name}</h1>
+            <img src="../assets/octocat.png" alt="GitHub Octocat" class="d-octocat">
+          </div>
+        </div>
+    """
+    # -------- Branches --------
+    if branches:
+        azure_br_ul = _ul(branches["azure_branches"])
+        github_br_ul = _ul(branches["github_branches"])
+        shared_br_ul = _ul(branches["shared_branches"])
+        only_az = branches.get("only_in_azure", [])
+        only_gh = branches.get("only_in_github", [])
+        only_az_ul = _ul(only_az)
+        only_gh_ul = _ul(only_gh)
+        branches_estado = row.branches_status
+
+        detalle_html += f"""
+        <table>
+            <tr><th>Branches en Azure</th><th>Branches en GitHub</th><th>Comunes</th><th>Solo Azure</th><th>Solo GitHub</th><th>Estado</th></tr>
+            <tr><td>{azure_br_ul}</td><td>{github_br_ul}</td><td>{shared_br_ul}</td><td>{only_az_ul}</td><td>{only_gh_ul}</td><td>{branches_estado}</td></tr>
+        </table>
+        """
+
+    # -------- Commits --------
+    if commits:
+        detalle_html += """
+        <table>
+            <tr><th>Branch</th><th>Commits comunes</th><th>Faltan en GitHub</th><th>Extras en GitHub</th><th>Estado</th></tr>
+        """
+        for br, per_branch_estado in zip(commits["branches"], row.branch_commit_statuses):
+            missing_cnt = _count(br, "missing_in_github")
+            extras_cnt = _count(br, "extra_in_github")
+
+            # En modo tip/ancestro no se listan los commits comunes: se muestra cómo se verificó
+            verification = br.get("verification", "full")
+            if verification == "tip":
+                shared_cell = "— (tip idéntico)"
+            elif verification == "ancestry":
+                shared_cell = "— (verificado por ancestro)"
+            else:
+                shared_cell = _count(br, "shared_commits")
+
+            # ♻ = rama sin cambios de tip: resultado arrastrado de la corrida anterior
+            branch_cell = br.get('branch', '') + (" ♻" if br.get("carried_forward") else "")
+
+            detalle_html += (
+                f"<tr>"
+                f"<td>{branch_cell}</td>"
+                f"<td>{shared_cell}</td>"
+                f"<td>{missing_cnt}</td>"
+                f"<td>{extras_cnt}</td>"
+                f"<td>{per_branch_estado}</td>"
+                f"</tr>"
+            )
+        detalle_html += "</table>"
+
+        # SHAs faltantes: el sidecar del repo se lee solo si alguna rama tiene faltantes
+        for br in commits["branches"]:
+            missing_cnt = _count(br, "missing_in_github")
+            if missing_cnt == 0:
+                continue
+            shas = commit_report.branch_shas(repo_name, br, "missing_in_github") \
+                or br.get("missing_in_github_preview", [])
+            mostrados = shas[:COMMITS_DETAIL_LIMIT]
+            nota = f" (mostrando {len(mostrados)} de {missing_cnt})" if len(mostrados) < missing_cnt else ""
+            detalle_html += (
+                f"<h3>Commits de Azure faltantes en GitHub — {br.get('branch','')}{nota}</h3>"
+                f"{_ul_with_icon(mostrados, icon='❌')}"
+            )
+
+    # -------- Tags --------
+    if tags:
+        azure_tags_ul = _ul(tags["azure_tags"])
+        github_tags_ul = _ul(tags["github_tags"])
+        shared_ul = _ul(tags["shared_tags"])
+        faltantes_ul = _ul(tags["only_in_azure"] if tags["only_in_azure"] else tags["only_in_github"])
+        tags_estado = row.tags_status
+        detalle_html += f"""
+        <table>
+            <tr><th>Tags Azure</th><th>Tags GitHub</th><th>Comunes</th><th>Faltantes</th><th>Estado</th></tr>
+            <tr>
+                <td>{azure_tags_ul}</td>
+                <td>{github_tags_ul}</td>
+                <td>{shared_ul}</td>
+                <td>{faltantes_ul}</td>
+                <td>{tags_estado}</td>
+            </tr>
+        </table>
+        """
+        mismatches = tags.get("target_mismatches", [])
+        if mismatches:
+            detalle_html += (
+                "<h3>Tags con distinto commit</h3>"
+                "<table><tr><th>Tag</th><th>Commit en Azure</th><th>Commit en GitHub</th></tr>"
+                + "".join(
+                    f"<tr><td>❌ {m['tag']}</td><td><code>{m['azure']}</code></td><td><code>{m['github']}</code></td></tr>"
+                    for m in mismatches
+                )
+                + "</table>"
+            )
+
+    # -------- Contenido (árbol raíz de cada tip) --------
+    content = row.content
+    if content:
+        detalle_html += f"""
+        <h2>Contenido</h2>
+        <p>Árbol raíz del tip de {len(content["branches"])} ramas emparejadas: {row.content_status}</p>
+        """
+        if content.get("error"):
+            detalle_html += f"<p>⚠️ {content['error']}</p>"
+        distintas = [b for b in content["branches"] if not b.get("match")]
+        if distintas:
+            detalle_html += "<table><tr><th>Branch</th><th>Árbol Azure</th><th>Árbol GitHub</th></tr>"
+            for b in distintas:
+                detalle_html += (
+                    f"<tr><td>❌ {b['branch']}</td>"
+                    f"<td><code>{b.get('azure_tree') or '—'}</code></td>"
+                    f"<td><code>{b.get('github_tree') or b.get('error', '—')}</code></td></tr>"
+                )
+            detalle_html += "</table>"
+
+    # -------- Workflows --------
+    detalle_html += """
+    <h2>Workflows</h2>
+    <table>
+        <tr><th>Directorio existe</th><th>Archivos presentes</th><th>Faltantes</th><th>Distintos a la plantilla</th><th>Estado</th></tr>
+    """
+    if workflows:
+        estado = row.workflows_status
+        presentes_list = workflows.get("present_files", [])
+        faltantes_list = workflows.get("missing_files", [])
+        presentes_html = _ul(presentes_list)
+        faltantes_html = _ul_with_icon(faltantes_list, icon="❌")
+        distintos_html = _ul_with_icon(workflows.get("drifted_files", []), icon="❌")
+        dir_existe = "Sí" if workflows.get("workflow_dir_exists") else "No"
+        detalle_html += (
+            f"<tr><td>{dir_existe}</td><td>{presentes_html}</td><td>{faltantes_html}</td>"
+            f"<td>{distintos_html}</td><td>{estado}</td></tr>"
+        )
+        detalle_html += "</table>"
+        if workflows.get("error"):
+            detalle_html += f"<p>⚠️ {workflows['error']}</p>"
+    else:
+        detalle_html += "<tr><td colspan='5'>Sin información</td></tr></table>"
+
+    detalle_html += "</body></html>"
+    return detalle_html
+# === FIN detalle ===
+
+
+def write_if_changed(path, content):
+    """Escribe 'content' solo si difiere (por hash) de lo que ya hay en disco. True si escribió."""
+    data = content.encode("utf-8")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def _write_detail(row):
+    path = os.path.join(DETAILS_DIR, f"{row.repo_name}.html")
+    return write_if_changed(path, renderiza_detalle_repo_html(row))
+
+
+_worker_rows = None     # en cada hijo del pool: {repo: RepoReport} leído de disco una vez
+
+
+def _init_worker(data_dir):
+    global _worker_rows
+    _worker_rows = {row.repo_name: row for row in ReportModel.load(data_dir, warn=False).rows}
+
+
+def _write_detail_by_name(repo_name):
+    return _write_detail(_worker_rows[repo_name])
+
+
+def write_detail_pages(rows, workers=REPORT_WORKERS, data_dir=DATA_DIR):
+    """
+    Renderiza los detalles en paralelo. Devuelve (escritos, sin_cambios).
+    'rows' debe venir de ReportModel.load(data_dir): los hijos releen ese modelo de disco.
+    """
+    os.makedirs(DETAILS_DIR, exist_ok=True)
+    rows = list(rows)
+    if workers <= 1 or len(rows) < 2:
+        changed = [_write_detail(row) for row in rows]
+    else:
+        chunksize = max(1, len(rows) // (workers * 4))
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(os.path.abspath(data_dir),)) as ex:
+            changed = list(ex.map(_write_detail_by_name, [row.repo_name for row in rows],
+                                  chunksize=chunksize))
+    written = sum(changed)
+    return written, len(changed) - written
+
+
+# === Página principal ===
+
+_MAIN_HEAD = """
+<html>
+<head>
+    <title>Reporte de Migración Azure DevOps → GitHub</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width,initial-scale=1">
+    <link rel="stylesheet" href="assets/{stylesheet}">
+</head>
+<body class="main">
+
+    <!-- HERO HEADER centrado -->
+    <div class="hero">
+      <h1 class="hero-title">
+         Reporte de Migración Azure DevOps → GitHub
+        <img src="assets/octocat.png" alt="GitHub Octocat" class="octocat-inline">
+      </h1>
+      <p class="hero-sub"><b>Responsable de la certificación:</b> Jhoao Carranza</p>
+      <p class="hero-sub"><b>Fecha de ejecución:</b> {fecha_hora}</p>
+    </div>
+
+    <!-- Encabezado de tabla + buscador -->
+    <div class="header-flex">
+        <h2 style="margin: 0;"> Repositorios Emparejados <span style='font-weight:normal;'>(<b>{total}</b>)</span></h2>
+        <input type="text" id="buscadorRepo" onkeyup="filtrarRepos()" placeholder="🔎 Buscar repositorio..." class="buscador-repo">
+    </div>
+
+    <table>
+        <tr><th>Repositorio</th><th>Estado Branches</th><th>Estado Commits</th><th>Estado Tags</th><th>Workflows</th></tr>
+"""
+
+_PANEL_HEAD = """
+  <div class="panel">
+    <div class="panel-header">
+      <div class="panel-title">{title}</div>
+      <div class="count-pill">{total}</div>
+    </div>
+    <div class="panel-body">
+"""
+
+_PANEL_TAIL = """
+    </div>
+  </div>
+"""
+
+# === JS buscador ===
+_SCRIPT = """
+<script>
+function filtrarRepos() {
+  const input = document.getElementById("buscadorRepo");
+  const filtro = input.value.toLowerCase();
+  const tabla = document.querySelector("table");
+  const filas = tabla.getElementsByTagName("tr");
+  for (let i = 1; i < filas.length; i++) {
+    const td = filas[i].getElementsByTagName("td")[0];
+    if (td) {
+      const txt = td.textContent || td.innerText;
+      filas[i].style.display = txt.toLowerCase().indexOf(filtro) > -1 ? "" : "none";
+    }
+  }
+}
+</script>
+"""
+
+
+def _write_panel(f, title, names, empty_msg):
+    f.write(_PANEL_HEAD.format(title=title, total=len(names)))
+    if names:
+        f.write("<ul class='tidy'>")
+        for name in names:
+            f.write(f"<li>{name}</li>")
+        f.write("</ul>")
+    else:
+        f.write(f"<div class='empty'>{empty_msg}</div>")
+    f.write(_PANEL_TAIL)
+
+
+def write_main_report(model, fecha_hora, path=os.path.join(REPORTS_DIR, "final_report.html")):
+    """Escribe la página principal fila por fila desde el ReportModel."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_MAIN_HEAD.format(stylesheet=STYLESHEET, fecha_hora=fecha_hora, total=len(model.rows)))
+
+        # Repos emparejados
+        for row in model.rows:
+            f.write(
+                f"<tr><td><a href='detalles/{row.repo_name}.html'>{row.repo_name}</a></td>"
+                f"<td>{row.branches_status}</td><td>{row.commits_status}</td>"
+                f"<td>{row.tags_status}</td><td>{row.workflows_status}</td></tr>\n"
+            )
+        f.write("</table>")
+
+        # Repos NO emparejados
+        solo_az = [r["repo_name"] for r in model.only_in_azure]
+        solo_gh = [r["repo"] for r in model.only_in_github]
+        f.write(f"""
+<h2 class="section-title"> Repos no emparejados</h2>
+<div class="stat-chips">
+  <span class="chip">📁 Total en Azure: <strong>{len(solo_az)}</strong></span>
+  <span class="chip">🐙 Total en GitHub: <strong>{len(solo_gh)}</strong></span>
+</div>
+
+<div class="grid-2">
+""")
+        _write_panel(f, "📁 Solo en Azure", solo_az, "No hay repositorios únicamente en Azure.")
+        _write_panel(f, "🐙 Solo en GitHub", solo_gh, "No hay repositorios únicamente en GitHub.")
+        f.write("</div>  <!-- .grid-2 -->\n")
+        f.write(_SCRIPT)
+        f.write("</body></html>")
@@ -0,0 +1,195 @@
+# report_model.py
+"""
+Modelo en memoria del reporte final.
+
+Los JSON de data/ se cargan una sola vez y se indexan por nombre de repo (los
+workflows también por el nombre de GitHub, que es con el que los guarda su etapa).
+El estado de cada repo se calcula una vez y lo comparten la tabla principal y las
+páginas de detalle, en lugar de recorrer las listas completas por cada repo.
+"""
+
+import json
+import os
+
+DATA_DIR = "data"
+
+SIN_INFO = "❌ Sin info"
+
+
+def _count(br, key):
+    """Conteo de una lista de commits; respeta '<key>_count' cuando la lista no se guardó completa."""
+    return br.get(f"{key}_count", len(br.get(key, [])))
+
+
+def _load(name, default, data_dir=DATA_DIR, warn=True):
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        if warn:
+            print(f"⚠️ No se encontró {path}; la sección quedará sin información")
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _index(items, key="repo"):
+    """{ valor de key: item }; ante duplicados gana el primero (igual que next())."""
+    index = {}
+    for item in items:
+        index.setdefault(item.get(key), item)
+    return index
+
+
+# === Estados (HTML) ===
+
+def branches_status(branches):
+    # Azure ⊆ GitHub; las extras en GitHub se permiten y se cuentan
+    if not branches:
+        return SIN_INFO
+    only_az = branches.get("only_in_azure", [])
+    only_gh = branches.get("only_in_github", [])
+    if only_az:
+        return "<span class='fail'>⚠ Faltan ramas de Azure en GitHub</span>"
+    if not only_gh:
+        return "<span class='ok'>✔ Completo</span>"
+    return f"<span class='ok'>✔ Cumple (Extras en GitHub: {len(only_gh)})</span>"
+
+
+def branch_commits_status(br):
+    # Verde si NO faltan commits de Azure en GitHub (extras en GitHub permitidas)
+    if _count(br, "missing_in_github"):
+        return "<span class='fail'>⚠ Faltan commits de Azure en GitHub</span>"
+    extras_cnt = _count(br, "extra_in_github")
+    if extras_cnt == 0:
+        return "<span class='ok'>✔ Completo</span>"
+    return f"<span class='ok'>✔ Cumple (Extras en GitHub: {extras_cnt})</span>"
+
+
+def commits_status(commits):
+    # Si falta algún commit de Azure en GitHub → falla
+    if not commits:
+        return SIN_INFO
+    if any(_count(b, "missing_in_github") > 0 for b in commits["branches"]):
+        return "<span class='fail'>❌ Faltan commits de Azure en GitHub</span>"
+    extras_total = sum(_count(b, "extra_in_github") for b in commits["branches"])
+    if extras_total == 0:
+        return "<span class='ok'>✔ Completo</span>"
+    return f"<span class='ok'>✔ Cumple (Extras en GitHub: {extras_total})</span>"
+
+
+def tags_status(tags):
+    if not tags:
+        return SIN_INFO
+    if tags["only_in_azure"] or tags["only_in_github"]:
+        return "<span class='fail'>❌ Faltan tags</span>"
+    # Mismo nombre pero otro commit (resultados anteriores no traen la clave)
+    if tags.get("target_mismatches"):
+        return "<span class='fail'>❌ Tags con distinto commit</span>"
+    return "<span class='ok'>✔ Tags iguales</span>"
+
+
+def workflows_status(wf):
+    if not wf:
+        return SIN_INFO
+    if wf.get("error"):
+        return "<span class='fail'>❌ Sin datos de workflows</span>"
+    if wf.get("ok"):
+        if wf.get("untemplated_files"):
+            # Presentes, pero sin plantilla no se pudo verificar el contenido
+            return f"<span class='ok'>✔ Requeridos OK (sin plantilla: {len(wf['untemplated_files'])})</span>"
+        return "<span class='ok'>✔ Requeridos OK</span>"
+    if not wf.get("workflow_dir_exists"):
+        return "<span class='fail'>❌ Falta .github/workflows</span>"
+    if wf.get("missing_files"):
+        return "<span class='fail'>❌ Faltan archivos</span>"
+    if wf.get("drifted_files"):
+        return "<span class='fail'>❌ Distintos a la plantilla</span>"
+    return "<span class='fail'>❌ Faltan archivos</span>"
+
+
+def content_status(content):
+    if not content:
+        return SIN_INFO
+    if content.get("error"):
+        return "<span class='fail'>❌ Sin datos de contenido</span>"
+    if content["mismatches"]:
+        return f"<span class='fail'>❌ Contenido distinto (ramas: {len(content['mismatches'])})</span>"
+    return "<span class='ok'>✔ Árboles idénticos</span>"
+
+
+class RepoReport:
+    """Datos y estados de un repo emparejado, listos para ambos renderers."""
+
+    __slots__ = (
+        "repo_name", "github_name", "branches", "commits", "tags", "workflows", "content",
+        "branches_status", "commits_status", "tags_status", "workflows_status", "content_status",
+        "branch_commit_statuses",
+    )
+
+    def __init__(self, repo_name, github_name, branches, commits, tags, workflows, content=None):
+        self.repo_name = repo_name
+        self.github_name = github_name
+        self.branches = branches
+        self.commits = commits
+        self.tags = tags
+        self.workflows = workflows
+        self.content = content
+
+        self.branches_status = branches_status(branches)
+        self.commits_status = commits_status(commits)
+        self.tags_status = tags_status(tags)
+        self.workflows_status = workflows_status(workflows)
+        self.content_status = content_status(content)
+        # Estado por rama del detalle de commits (mismo orden que commits["branches"])
+        self.branch_commit_statuses = (
+            [branch_commits_status(br) for br in commits["branches"]] if commits else []
+        )
+
+
+class ReportModel:
+    """
+    Carga data/*.json una vez:
+
+        model = ReportModel.load()
+        for row in model.rows:
+            row.repo_name, row.branches_status, ...
+    """
+
+    def __init__(self, repos_data, branches_data, commits_data, tags_data, workflows_data, content_data=()):
+        self.repos_data = repos_data
+        self.only_in_azure = repos_data.get("only_in_azure", [])
+        self.only_in_github = repos_data.get("only_in_github", [])
+
+        branches_by_repo = _index(branches_data)
+        commits_by_repo = _index(commits_data)
+        tags_by_repo = _index(tags_data)
+        content_by_repo = _index(content_data)
+        # La etapa de workflows guarda el nombre de GitHub; se cruza por ambos nombres
+        workflows_by_repo = _index(workflows_data)
+
+        self.rows = []
+        for repo in repos_data.get("matched", []):
+            repo_name = repo["azure"]["repo_name"]
+            gh_repo_name = repo.get("github", {}).get("repo")
+            wf = workflows_by_repo.get(gh_repo_name) or workflows_by_repo.get(repo_name)
+            self.rows.append(RepoReport(
+                repo_name,
+                gh_repo_name,
+                branches_by_repo.get(repo_name),
+                commits_by_repo.get(repo_name),
+                tags_by_repo.get(repo_name),
+                wf,
+                content_by_repo.get(repo_name),
+            ))
+
+    @classmethod
+    def load(cls, data_dir=DATA_DIR, warn=True):
+        def load(name, default):
+            return _load(name, default, data_dir, warn)
+        return cls(
+            load("repos_output.json", {"matched": [], "only_in_azure": [], "only_in_github": []}),
+            load("branches_comparison.json", []),
+            load("commits_comparison.json", []),
+            load("tags_comparison.json", []),
+            load("workflows_check.json", []),
+            load("content_parity.json", []),
+        )
@@ -0,0 +1,53 @@
+# sha_sets.py
+"""
+Conjuntos de SHAs compactos: arrays NumPy contiguos de 20 bytes por commit (dtype S20),
+ordenados y sin duplicados, en lugar de sets de strings de 40 caracteres.
+
+Un millón de commits ocupa ~20 MB (vs. ~150 MB como set de str) y la diferencia
+se hace con operaciones sobre arrays ordenados (setdiff1d). De los comunes solo se
+guarda el conteo: es la lista más grande y el reporte no la necesita.
+"""
+
+import numpy as np
+
+SHA_BYTES = 20
+_DTYPE = f"S{SHA_BYTES}"
+
+
+def from_hex(shas):
+    """Iterable de SHAs hex (40 chars) -> array S20 ordenado y único."""
+    if isinstance(shas, np.ndarray):
+        return shas
+    joined = "".join(shas)
+    if len(joined) % (2 * SHA_BYTES):
+        raise ValueError("Se esperaban SHAs de 40 caracteres hexadecimales")
+    raw = bytes.fromhex(joined)
+    return np.unique(np.frombuffer(raw, dtype=_DTYPE))
+
+
+def from_bytes(shas):
+    """Iterable de SHAs binarios (20 bytes) -> array S20 ordenado y único."""
+    return np.unique(np.frombuffer(b"".join(shas), dtype=_DTYPE))
+
+
+def union(a, b):
+    """Unión de dos arrays S20 ordenados y únicos."""
+    return np.union1d(a, b)
+
+
+def to_hex(arr):
+    """Array S20 -> lista de SHAs hex, en el mismo orden (ordenada si viene de from_hex)."""
+    # tobytes() conserva los 20 bytes (un elemento S20 convertido a bytes perdería NULs finales)
+    h = arr.tobytes().hex()
+    step = 2 * SHA_BYTES
+    return [h[i:i + step] for i in range(0, len(h), step)]
+
+
+def diff(azure, github):
+    """
+    (missing_in_github, extra_in_github) como arrays S20 y la cantidad de comunes.
+    Ambas entradas deben venir de from_hex/from_bytes (ordenadas y únicas).
+    """
+    missing = np.setdiff1d(azure, github, assume_unique=True)
+    extra = np.setdiff1d(github, azure, assume_unique=True)
+    return missing, extra, len(azure) - len(missing)
@@ -1,12 +1,23 @@
 # tests/test_commits.py
 import sys
 import os
-import time
+import asyncio
+import contextlib
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
 import json
-from config import GITHUB_TOKEN, AZURE_TOKEN, AZURE_ORG, AZURE_PROJECT
+from config import GITHUB_TOKEN, AZURE_TOKEN
+from commit_graph import CommitGraphStore
+import ref_tips
+import async_http
+import rate_limit
+import repo_inventory
+import sha_sets
+import commit_report
+import azure_commits
+import github_pages
+import http_client
+import git_mirror
 
 # ---------------------------
 # Imports y config
@@ -14,6 +25,14 @@ from config import GITHUB_TOKEN, AZURE_TOKEN, AZURE_ORG, AZURE_PROJECT
 from concurrent.futures import ThreadPoolExecutor, as_completed
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))  # <-- Ajusta 8–24 según tu token)
 
+# Modo de verificación de commits:
+#   "ancestry" -> compara tips y usa /compare de GitHub; solo lista historial completo si no se puede probar
+#   "full"     -> siempre lista el historial completo en ambos lados (comportamiento original)
+COMMITS_VERIFY_MODE = os.getenv("COMMITS_VERIFY_MODE", "ancestry").strip().lower()
+
+# Páginas de historial de GitHub en vuelo por rama (la cola de ramas ya usa MAX_WORKERS hilos)
+GITHUB_COMMIT_PAGE_WINDOW = int(os.getenv("GITHUB_COMMIT_PAGE_WINDOW", "4"))
+
 # ---------------------------
 # Utilidades para alias master <-> main
 # ---------------------------
@@ -74,42 +93,57 @@ def load_branch_pairs():
     return result
 
 
+def iter_github_commit_pages(owner, repo, branch, session=None):
+    """
+    Itera el historial de una rama de GitHub página a página.
+    Cada página es una lista [(sha, [parents...]), ...] del tip hacia atrás.
+    La primera respuesta trae el total de páginas (Link rel="last"); las siguientes
+    se piden en paralelo (GITHUB_COMMIT_PAGE_WINDOW en vuelo) y salen en orden.
+    """
+    s = session or http_client.session()
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    params = {"sha": branch, "per_page": 100}
+    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    # 409 = rama vacía (sin commits)
+    pages = github_pages.iter_pages(url, params=params, headers=headers, session=s,
+                                    window=GITHUB_COMMIT_PAGE_WINDOW, ok_missing=(409,))
+    try:
+        for data in pages:
+            if not data:
+                break
+            yield [(c["sha"], [p["sha"] for p in c.get("parents", [])]) for c in data]
+    finally:
+        pages.close()
+
+
 def get_github_commits(owner, repo, branch, session=None):  # <--- acepta session opcional
     commits = []
-    page = 1
-    s = session or requests.Session()  # <--- Reusa conexión si te paso una sesión
-    while True:
-        url = f"https://api.github.com/repos/{owner}/{repo}/commits?sha={branch}&per_page=100&page={page}"
-        headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-        response = s.get(url, headers=headers)
-        if response.status_code == 409:  # empty branch (e.g., no commits)
-            return []
-        response.raise_for_status()
-        try:
-            data = response.json()
-        except Exception as e:
-            print(f"\n⚠️ Error al parsear JSON de GitHub para {url}")
-            print("Status code:", response.status_code)
-            print("Response text:", response.text[:500])
-            raise
-        if not data:
-            break
-        commits.extend([c["sha"] for c in data])
-        page += 1
+    for batch in iter_github_commit_pages(owner, repo, branch, session=session):
+        commits.extend(sha for sha, _ in batch)
     return commits
 
 
-def get_azure_commits(repo_id, branch):
+def iter_azure_commit_pages(repo_id, branch):
     """
-    Trae TODOS los commits de Azure DevOps para una rama, usando 7.2-preview.2,
+    Itera TODOS los commits de Azure DevOps para una rama, usando 7.2-preview.2,
     $top=5000 y paginación via continuationToken (query param).
+    Cada página es una lista [(commitId, parents | None), ...] del tip hacia atrás.
+    Con AZURE_COMMIT_SLICES > 1 el historial se pide por ventanas de fecha en paralelo;
+    con AZURE_HISTORY_BACKEND=commitsbatch, vía POST commitsbatch (fetcher por repo).
     """
-    commits = []
+    if azure_commits.AZURE_HISTORY_BACKEND == "commitsbatch":
+        yield from azure_commits.batch_fetcher(repo_id).iter_pages(branch)
+        return
+    if azure_commits.AZURE_COMMIT_SLICES > 1:
+        yield from azure_commits.iter_sliced_pages(repo_id, branch)
+        return
+
+    total = 0
     continuation_token = None
     page = 1
 
-    session = requests.Session()
-    base_url = f"https://dev.azure.com/{AZURE_ORG}/{AZURE_PROJECT}/_apis/git/repositories/{repo_id}/commits"
+    session = http_client.session()
+    base_url = repo_inventory.azure_repo_url(repo_id, "commits")
 
     params = {
         "searchCriteria.itemVersion.versionType": "branch",
@@ -125,7 +159,8 @@ def get_azure_commits(repo_id, branch):
         else:
             params.pop("continuationToken", None)
 
-        response = session.get(
+        response = rate_limit.get(
+            session,
             base_url,
             auth=("", AZURE_TOKEN),
             params=params,
@@ -134,7 +169,7 @@ def get_azure_commits(repo_id, branch):
         )
 
         if response.status_code == 404:
-            return []
+            return
         response.raise_for_status()
 
         try:
@@ -145,114 +180,517 @@ def get_azure_commits(repo_id, branch):
             print("Response text:", response.text[:500])
             raise
 
-        batch = [c["commitId"] for c in data.get("value", [])]
-        commits.extend(batch)
+        # 'parents' puede no venir en el listado: None obliga al store a paginar completo
+        batch = [(c["commitId"], c.get("parents")) for c in data.get("value", [])]
+        total += len(batch)
 
-        print(f"🔎 [AZURE] Página {page}: Traídos {len(batch)} commits (total: {len(commits)})")
+        print(f"🔎 [AZURE] Página {page}: Traídos {len(batch)} commits (total: {total})")
+        yield batch
 
         continuation_token = response.headers.get("x-ms-continuationtoken")
         if not continuation_token:
             break
 
         page += 1
-        time.sleep(0.2)  # pequeño respiro por si hay rate limiting
 
+
+def get_azure_commits(repo_id, branch):
+    commits = []
+    for batch in iter_azure_commit_pages(repo_id, branch):
+        commits.extend(sha for sha, _ in batch)
     return commits
 
 
+def get_azure_branch_tip(repo_id, branch, session=None):
+    """
+    Devuelve el SHA del tip de una rama en Azure DevOps (o None si no existe).
+    """
+    s = session or http_client.session()
+    url = repo_inventory.azure_repo_url(repo_id, "refs")
+    params = {"filter": f"heads/{branch}", "api-version": "7.2-preview.2"}
+    response = rate_limit.get(s, url, auth=("", AZURE_TOKEN), params=params, timeout=60)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    # El filtro es por prefijo: nos quedamos solo con el nombre exacto
+    for ref in response.json().get("value", []):
+        if ref.get("name") == f"refs/heads/{branch}":
+            return ref.get("objectId")
+    return None
+
+
+def load_previous_commit_results():
+    """
+    Resultados de la corrida anterior por repo y rama: { repo: { label: result } }.
+    Se usan para arrastrar ramas cuyo tip no cambió (re-certificación incremental)
+    y para estimar el tamaño de cada rama al ordenar la cola de trabajo.
+    """
+    path = os.path.join("data", "commits_comparison.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {r["repo"]: {b["branch"]: b for b in r.get("branches", [])} for r in rows}
+
+
+def _reusable(prev_result, azure_tip, github_tip):
+    """
+    True si el resultado anterior se calculó contra estos mismos tips y con una
+    verificación que alcanza para el modo actual (full/mirror exigen listado completo).
+    Los resultados sin tips guardados (formato anterior) siempre se recalculan.
+    """
+    if not prev_result or not azure_tip or not github_tip:
+        return False
+    if (prev_result.get("azure_tip"), prev_result.get("github_tip")) != (azure_tip, github_tip):
+        return False
+    if git_mirror.enabled() or COMMITS_VERIFY_MODE == "full":
+        return prev_result.get("verification") in ("full", "mirror")
+    return prev_result.get("verification") in ("tip", "ancestry", "full", "mirror")
+
+
+def _estimate_commits(prev_result):
+    """Commits que tuvo la rama en la corrida anterior (0 si no hay dato o se verificó por tip)."""
+    if not prev_result:
+        return 0
+    return sum(
+        prev_result.get(f"{key}_count", len(prev_result.get(key, [])))
+        for key in ("shared_commits", "missing_in_github", "extra_in_github")
+    )
+
+
+def _order_jobs(planned):
+    """
+    Cola global (repo, az_branch, gh_branch) con la rama más larga primero.
+
+    Dentro de un repo solo la primera rama descarga la historia completa (las demás
+    reusan el store), así que el orden es: la rama más grande de CADA repo, de mayor a
+    menor; luego la segunda de cada repo; etc. Así ningún worker queda esperando el
+    lock del store de un repo mientras otros repos tienen trabajo pendiente.
+    Tamaño = commits de la corrida anterior; sin ese dato, cantidad de ramas del repo.
+    """
+    keyed = []
+    for repo_result, jobs, _, _, sizes in planned:
+        ranked = sorted(zip(jobs, sizes), key=lambda js: -js[1])
+        for rank, (job, size) in enumerate(ranked):
+            keyed.append(((rank, -size, -len(jobs)), repo_result, job))
+    keyed.sort(key=lambda k: k[0])
+    return [(repo_result, job) for _, repo_result, job in keyed]
+
+
+def get_github_branch_tip(owner, repo, branch, session=None):
+    """
+    Devuelve el SHA del tip de una rama en GitHub (o None si no existe).
+    """
+    s = session or http_client.session()
+    url = f"https://api.github.com/repos/{owner}/{repo}/git/ref/heads/{branch}"
+    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    response = rate_limit.get(s, url, headers=headers, timeout=60)
+    if response.status_code in (404, 409):
+        return None
+    response.raise_for_status()
+    return response.json().get("object", {}).get("sha")
+
+
+def github_contains_commit(owner, repo, base_sha, head_branch, session=None):
+    """
+    Usa /compare/{base}...{head} para saber si base_sha es ancestro de head_branch en GitHub.
+    Retorna (es_ancestro, ahead_by). Si el SHA no existe en GitHub, (False, None).
+    """
+    s = session or http_client.session()
+    url = f"https://api.github.com/repos/{owner}/{repo}/compare/{base_sha}...{head_branch}"
+    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    # per_page=1: solo nos interesan status/ahead_by, no la lista de commits
+    response = rate_limit.get(s, url, headers=headers, params={"per_page": 1}, timeout=60)
+    if response.status_code in (404, 422):
+        return False, None
+    response.raise_for_status()
+    data = response.json()
+    # "identical" o "ahead" => base es alcanzable desde head (behind_by == 0)
+    if data.get("status") in ("identical", "ahead"):
+        return True, data.get("ahead_by", 0)
+    return False, None
+
+
+def _ancestry_result(label, azure_tip, github_tip, verification, extras_cnt):
+    """Resultado de una rama verificada por tip idéntico o por ancestro (sin listar historial)."""
+    log_lines = [
+        f"🔁 Branch: {label}",
+        f"   ✔ Verificado por {'tip idéntico' if verification == 'tip' else 'ancestro (compare)'}: {azure_tip[:10]}"
+    ]
+    if extras_cnt:
+        log_lines.append(f"   ⚠️ Extras en GitHub (no en Azure): {extras_cnt}")
+
+    return {
+        "ok": True,
+        "log": "\n".join(log_lines),
+        "result": {
+            "branch": label,
+            "verification": verification,
+            "azure_tip": azure_tip,
+            "github_tip": github_tip,
+            # Sin listado completo no conocemos los SHAs individuales, solo los conteos
+            "shared_commits": [],
+            "missing_in_github": [],
+            "extra_in_github": [],
+            "extra_in_github_count": extras_cnt
+        }
+    }
+
+
+def _listed_result(label, verification, shared_commits, missing_in_github, extra_in_github, shared_count=None):
+    """Resultado de una rama con faltantes/extras listados (shared_count: comunes sin listar)."""
+    shared_cnt = len(shared_commits) if shared_count is None else shared_count
+    log_lines = [
+        f"🔁 Branch: {label}",
+        f"   ✔ Commits comunes: {shared_cnt}"
+    ]
+    if missing_in_github:
+        log_lines.append(f"   ❌ Faltan en GitHub: {len(missing_in_github)}")
+    if extra_in_github:
+        log_lines.append(f"   ⚠️ Extras en GitHub (no en Azure): {len(extra_in_github)}")
+
+    result = {
+        "branch": label,  # p.ej. "master → main" o "main → master" o "dev"
+        "verification": verification,
+        "shared_commits": shared_commits,
+        "missing_in_github": missing_in_github,
+        "extra_in_github": extra_in_github
+    }
+    if shared_count is not None:
+        result["shared_commits_count"] = shared_count
+    return {"ok": True, "log": "\n".join(log_lines), "result": result}
+
+
+def _diff_result(label, azure_commits, github_commits):
+    """
+    Resultado de una rama a partir de los historiales completos de ambos lados
+    (arrays S20 del store, o SHAs hex). La diferencia se hace sobre arrays binarios
+    ordenados; solo faltantes y extras pasan a hex para el JSON, los comunes quedan
+    como conteo.
+    """
+    azure_arr = sha_sets.from_hex(azure_commits)
+    github_arr = sha_sets.from_hex(github_commits)
+    missing, extra, shared = sha_sets.diff(azure_arr, github_arr)
+    return _listed_result(label, "full", [], sha_sets.to_hex(missing), sha_sets.to_hex(extra),
+                          shared_count=shared)
+
+
+def _verify_by_ancestry(azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label, gh_sess):
+    """
+    Verificación rápida sin listar historiales:
+      1) tips iguales            -> historiales idénticos
+      2) tip de Azure es ancestro de la rama en GitHub -> no falta ningún commit de Azure
+    Retorna el mismo dict que _compare_one_branch, o None si hay que caer al listado completo.
+    """
+    azure_tip = get_azure_branch_tip(azure_repo_id, az_branch)
+    if not azure_tip:
+        return None
+    github_tip = get_github_branch_tip(gh_owner, gh_repo, gh_branch, session=gh_sess)
+
+    if azure_tip == github_tip:
+        return _ancestry_result(label, azure_tip, github_tip, "tip", 0)
+    is_ancestor, ahead_by = github_contains_commit(gh_owner, gh_repo, azure_tip, gh_branch, session=gh_sess)
+    if not is_ancestor:
+        return None
+    return _ancestry_result(label, azure_tip, github_tip, "ancestry", ahead_by or 0)
+
+
+def _verify_by_mirror(azure_repo_id, az_branch, gh_branch, label):
+    """
+    Diff de historiales sobre el mirror local (VERIFY_BACKEND=mirror): git recorre solo
+    la diferencia de cada lado (rev-list A --not B) y cuenta los comunes con --count, sin
+    volcar el historial completo. Los comunes quedan como conteo (sin lista).
+    """
+    mirror = git_mirror.open_mirror(azure_repo_id)
+    missing = sorted(mirror.rev_list("azure", az_branch, exclude=("github", gh_branch)))
+    extra = sorted(mirror.rev_list("github", gh_branch, exclude=("azure", az_branch)))
+    shared = mirror.count("azure", az_branch) - len(missing)
+    return _listed_result(label, "mirror", [], missing, extra, shared_count=shared)
+
+
 # ---------------------------------------------------
 # Worker para comparar UNA rama en paralelo (con alias)
 # ---------------------------------------------------
-def _compare_one_branch(azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label):
+def _compare_fast(azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label,
+                  az_store=None, gh_store=None):
+    """
+    Verificación que no toca los stores: mirror local, o tips/ancestro en modo ancestry.
+    Devuelve None si hay que listar el historial (_compare_by_history).
+    """
     try:
-        # Sesión propia por hilo para GitHub (reusa keep-alive dentro del hilo)
-        gh_sess = requests.Session()
-
-        azure_commits = set(get_azure_commits(azure_repo_id, az_branch))
-        github_commits = set(get_github_commits(gh_owner, gh_repo, gh_branch, session=gh_sess))
-
-        missing_in_github = sorted(azure_commits - github_commits)
-        extra_in_github = sorted(github_commits - azure_commits)
-        shared_commits = sorted(azure_commits & github_commits)
-
-        log_lines = [
-            f"🔁 Branch: {label}",
-            f"   ✔ Commits comunes: {len(shared_commits)}"
-        ]
-        if missing_in_github:
-            log_lines.append(f"   ❌ Faltan en GitHub: {len(missing_in_github)}")
-        if extra_in_github:
-            log_lines.append(f"   ⚠️ Extras en GitHub (no en Azure): {len(extra_in_github)}")
-
-        return {
-            "ok": True,
-            "log": "\n".join(log_lines),
-            "result": {
-                "branch": label,  # p.ej. "master → main" o "main → master" o "dev"
-                "shared_commits": shared_commits,
-                "missing_in_github": missing_in_github,
-                "extra_in_github": extra_in_github
-            }
-        }
+        if git_mirror.enabled():
+            return _verify_by_mirror(azure_repo_id, az_branch, gh_branch, label)
+        if COMMITS_VERIFY_MODE == "ancestry":
+            return _verify_by_ancestry(azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label,
+                                       http_client.session())
+        return None
+    except Exception as e:
+        return {"ok": False, "log": f"⚠️ Error al comparar branch {label}: {e}"}
+
+
+def _compare_by_history(azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label,
+                        az_store=None, gh_store=None):
+    """
+    Diff de historiales completos. Si se pasan az_store/gh_store (CommitGraphStore por
+    repo), el historial se resuelve desde el store compartido por todas las ramas del repo.
+    """
+    try:
+        # Sesión compartida del proceso (pool de conexiones por host)
+        gh_sess = http_client.session()
+
+        if az_store is not None:
+            azure_commits = az_store.load_branch(az_branch, iter_azure_commit_pages(azure_repo_id, az_branch))
+        else:
+            azure_commits = get_azure_commits(azure_repo_id, az_branch)
+        if gh_store is not None:
+            github_commits = gh_store.load_branch(
+                gh_branch, iter_github_commit_pages(gh_owner, gh_repo, gh_branch, session=gh_sess)
+            )
+        else:
+            github_commits = get_github_commits(gh_owner, gh_repo, gh_branch, session=gh_sess)
+
+        return _diff_result(label, azure_commits, github_commits)
     except Exception as e:
         return {"ok": False, "log": f"⚠️ Error al comparar branch {label}: {e}"}
 
 
+def _compare_one_branch(*job):
+    """Compara una rama: primero sin historial y, si no alcanza, con el historial completo."""
+    res = _compare_fast(*job)
+    return res if res is not None else _compare_by_history(*job)
+
+
+# ---------------------------------------------------
+# Variante asyncio (HTTP_ENGINE=async): mismas reglas, sin hilo por rama
+# ---------------------------------------------------
+_GH_HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+_AZ_AUTH = ("", AZURE_TOKEN)
+
+
+def _azure_url(repo_id, resource):
+    return repo_inventory.azure_repo_url(repo_id, resource)
+
+
+async def iter_github_commit_pages_async(engine, owner, repo, branch):
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    params = {"sha": branch, "per_page": 100}
+    async for data in engine.github_pages(url, params=params, headers=_GH_HEADERS, ok_missing=(409,),
+                                          window=GITHUB_COMMIT_PAGE_WINDOW):
+        if not data:
+            return
+        yield [(c["sha"], [p["sha"] for p in c.get("parents", [])]) for c in data]
+
+
+async def iter_azure_commit_pages_async(engine, repo_id, branch):
+    """Como iter_azure_commit_pages (ventanas de fecha / commitsbatch incluidos), con el motor asyncio."""
+    if azure_commits.AZURE_HISTORY_BACKEND == "commitsbatch":
+        pages = azure_commits.batch_fetcher(repo_id).iter_pages_async(engine, branch)
+    elif azure_commits.AZURE_COMMIT_SLICES > 1:
+        pages = azure_commits.iter_sliced_pages_async(engine, repo_id, branch)
+    else:
+        pages = None
+    if pages is not None:
+        # aclosing: si el store corta antes, las ventanas pendientes se cancelan ya
+        async with contextlib.aclosing(pages):
+            async for page in pages:
+                yield page
+        return
+    params = {
+        "searchCriteria.itemVersion.versionType": "branch",
+        "searchCriteria.itemVersion.version": branch,
+        "$top": 5000,
+        "api-version": "7.2-preview.2"
+    }
+    async for data in engine.azure_pages(_azure_url(repo_id, "commits"), params=params, auth=_AZ_AUTH):
+        yield [(c["commitId"], c.get("parents")) for c in data.get("value", [])]
+
+
+async def _verify_by_ancestry_async(engine, azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label):
+    az_resp, gh_resp = await asyncio.gather(
+        engine.get(_azure_url(azure_repo_id, "refs"), auth=_AZ_AUTH,
+                   params={"filter": f"heads/{az_branch}", "api-version": "7.2-preview.2"}),
+        engine.get(f"https://api.github.com/repos/{gh_owner}/{gh_repo}/git/ref/heads/{gh_branch}",
+                   headers=_GH_HEADERS),
+    )
+    if az_resp.status_code == 404:
+        return None
+    az_resp.raise_for_status()
+    azure_tip = next((r.get("objectId") for r in az_resp.json().get("value", [])
+                      if r.get("name") == f"refs/heads/{az_branch}"), None)
+    if not azure_tip:
+        return None
+    github_tip = None
+    if gh_resp.status_code not in (404, 409):
+        gh_resp.raise_for_status()
+        github_tip = gh_resp.json().get("object", {}).get("sha")
+
+    if azure_tip == github_tip:
+        return _ancestry_result(label, azure_tip, github_tip, "tip", 0)
+    cmp_resp = await engine.get(
+        f"https://api.github.com/repos/{gh_owner}/{gh_repo}/compare/{azure_tip}...{gh_branch}",
+        params={"per_page": 1}, headers=_GH_HEADERS,
+    )
+    if cmp_resp.status_code in (404, 422):
+        return None
+    cmp_resp.raise_for_status()
+    data = cmp_resp.json()
+    if data.get("status") not in ("identical", "ahead"):
+        return None
+    return _ancestry_result(label, azure_tip, github_tip, "ancestry", data.get("ahead_by", 0) or 0)
+
+
+async def _compare_one_branch_async(engine, azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label,
+                                    az_store, gh_store):
+    try:
+        if COMMITS_VERIFY_MODE == "ancestry":
+            fast = await _verify_by_ancestry_async(engine, azure_repo_id, gh_owner, gh_repo, az_branch, gh_branch, label)
+            if fast is not None:
+                return fast
+        azure_commits, github_commits = await asyncio.gather(
+            az_store.load_branch_async(az_branch, iter_azure_commit_pages_async(engine, azure_repo_id, az_branch)),
+            gh_store.load_branch_async(gh_branch, iter_github_commit_pages_async(engine, gh_owner, gh_repo, gh_branch)),
+        )
+        return _diff_result(label, azure_commits, github_commits)
+    except Exception as e:
+        return {"ok": False, "log": f"⚠️ Error al comparar branch {label}: {e}"}
+
+
+async def _run_jobs_async(jobs):
+    """Todas las ramas de todos los repos a la vez; el límite lo pone el motor (requests en vuelo)."""
+    async with async_http.AsyncEngine() as engine:
+        results = await asyncio.gather(*(_compare_one_branch_async(engine, *job) for job in jobs))
+    print(f"🌐 [async] {engine.requests_sent} requests (HTTP/2: {'sí' if engine.http2 else 'no'})")
+    return results
+
+
+def _collect_result(repo_result, job, res, sidecars):
+    """Agrega el resultado de una rama al repo; las listas completas van al sidecar."""
+    print(f"📦 {repo_result['repo']} · {res['log']}")
+    label = job[5]
+    lists = None
+    if res.get("ok") and res.get("result"):
+        # Tips contra los que vale el resultado (el listado de la etapa de branches si el
+        # worker no los trae): la próxima corrida solo lo arrastra si siguen siendo esos
+        azure_tip, github_tip = ref_tips.branch_tips(repo_result["repo"], job[3], job[4])
+        res["result"].setdefault("azure_tip", azure_tip)
+        res["result"].setdefault("github_tip", github_tip)
+        entry, lists = commit_report.summarize(res["result"])
+        repo_result["branches"].append(entry)
+    sidecars.add(repo_result["repo"], label, lists)
+
+
+def plan_repo_commits(pair, branch_pairs, previous, sidecars):
+    """
+    Planifica las ramas de 1 repo: arrastra las que no cambiaron de tip y arma los jobs
+    del resto. Devuelve (repo_result, jobs, az_store, gh_store, sizes), o None si el
+    repo no tiene ramas emparejadas.
+    """
+    azure_repo = pair["azure"]
+    github_repo = pair["github"]
+    azure_id = azure_repo["repo_id"]
+    repo_name = azure_repo["repo_name"]
+
+    if not branch_pairs:
+        print(f"\n📦 Repositorio: {repo_name}")
+        print("⚠️  No hay ramas emparejadas para commits (considerando alias). Se omite.")
+        return None
+
+    repo_result = {
+        "repo": repo_name,
+        "branches": []
+    }
+
+    # Ramas calculadas contra los mismos tips que hoy: se arrastra el resultado anterior
+    prev_repo = previous.get(repo_name, {})
+    pending, carried = [], []
+    for (az_branch, gh_branch, label) in branch_pairs:
+        prev = prev_repo.get(label)
+        if ref_tips.INCREMENTAL and _reusable(prev, *ref_tips.branch_tips(repo_name, az_branch, gh_branch)):
+            carried.append({**prev, "carried_forward": True})
+        else:
+            pending.append((az_branch, gh_branch, label))
+    if carried:
+        print(f"♻️  {repo_name}: ramas sin cambios (resultado anterior): {len(carried)}")
+
+    # Las ramas arrastradas en formato resumen conservan sus listas del sidecar anterior
+    sidecars.expect(repo_name, len(pending), [c["branch"] for c in carried])
+    for prev in carried:
+        entry, lists = commit_report.summarize(prev)
+        sidecars.put(repo_name, prev["branch"], lists)
+        repo_result["branches"].append(entry)
+    sidecars.ready(repo_name)
+
+    # Un store de commits por lado, compartido por todas las ramas de este repo
+    az_store = CommitGraphStore(f"azure:{repo_name}")
+    gh_store = CommitGraphStore(f"github:{repo_name}")
+    jobs = [
+        (azure_id, github_repo["owner"], github_repo["repo"], az_branch, gh_branch, label, az_store, gh_store)
+        for (az_branch, gh_branch, label) in pending
+    ]
+    sizes = [_estimate_commits(prev_repo.get(label)) for (_, _, label) in pending]
+    return repo_result, jobs, az_store, gh_store, sizes
+
+
+def print_store_stats(repo_result, az_store, gh_store, azure_repo_id=None):
+    print(f"🗃️  {repo_result['repo']}: store Azure {len(az_store)} ({az_store.pages_fetched} páginas), "
+          f"GitHub {len(gh_store)} ({gh_store.pages_fetched} páginas)")
+    batch = azure_commits.batch_stats(azure_repo_id) if azure_repo_id else None
+    if batch:
+        print(f"   📮 commitsbatch: {batch['commits']} commits de {batch['branches']} ramas en "
+              f"{batch['requests']} requests, {batch['seconds']}s ({batch['commits_per_sec']} commits/s, "
+              f"{batch['bytes'] // 1024} KiB)")
+
+
 def test_commit_comparison(matched_repos):
     print("\n🔍 Comparando commits entre Azure y GitHub...")
 
     report = []
+    planned = []   # (repo_result, jobs, az_store, gh_store, sizes) en el orden de matched_repos
+    sidecars = commit_report.SidecarWriter()
 
     # Cargar pares de ramas (con alias master<->main) por repo
     branch_pairs_dict = load_branch_pairs()
+    previous = load_previous_commit_results()
 
     for pair in matched_repos:
-        azure_repo = pair["azure"]
-        github_repo = pair["github"]
-        azure_id = azure_repo["repo_id"]
-        repo_name = azure_repo["repo_name"]
-
-        print(f"\n📦 Repositorio: {repo_name}")
-        branch_pairs = branch_pairs_dict.get(repo_name, [])
-
-        if not branch_pairs:
-            print("⚠️  No hay ramas emparejadas para commits (considerando alias). Se omite.")
+        repo_name = pair["azure"]["repo_name"]
+        plan = plan_repo_commits(pair, branch_pairs_dict.get(repo_name, []), previous, sidecars)
+        if plan is None:
             continue
-
-        repo_result = {
-            "repo": repo_name,
-            "branches": []
-        }
-
+        planned.append(plan)
+        report.append(plan[0])
+
+    queue = _order_jobs(planned)
+    print(f"\n🧵 Cola global: {len(queue)} ramas de {len(planned)} repos")
+
+    if async_http.enabled() and not git_mirror.enabled():
+        # Un solo event loop para todas las ramas de todos los repos
+        results = async_http.run(_run_jobs_async([job for _, job in queue]))
+        for (repo_result, job), res in zip(queue, results):
+            _collect_result(repo_result, job, res, sidecars)
+    else:
         # --------------------------------------------------------
-        # Paralelismo por rama (usa pares az/gh)
+        # Un solo pool para todas las ramas de todos los repos:
+        # los workers no quedan ociosos entre un repo y el siguiente
         # --------------------------------------------------------
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-            futures = [
-                ex.submit(
-                    _compare_one_branch,
-                    azure_id,
-                    github_repo["owner"],
-                    github_repo["repo"],
-                    az_branch,
-                    gh_branch,
-                    label
-                )
-                for (az_branch, gh_branch, label) in branch_pairs
-            ]
+            futures = {ex.submit(_compare_one_branch, *job): (repo_result, job) for repo_result, job in queue}
 
             for fut in as_completed(futures):
-                res = fut.result()
-                print(res["log"])
-                if res.get("ok") and res.get("result"):
-                    repo_result["branches"].append(res["result"])
+                repo_result, job = futures[fut]
+                _collect_result(repo_result, job, fut.result(), sidecars)
 
-        report.append(repo_result)
+    for repo_result, jobs, az_store, gh_store, _ in planned:
+        print_store_stats(repo_result, az_store, gh_store, jobs[0][0] if jobs else None)
 
     # Guardar reporte en JSON
     os.makedirs("data", exist_ok=True)
     output_path = os.path.join("data", "commits_comparison.json")
     with open(output_path, "w") as f:
         json.dump(report, f, indent=4)
+    sidecars.prune()
 
     print(f"\n📝 Reporte de comparación de commits guardado en: {output_path}")
@@ -0,0 +1,168 @@
+# tests/test_content.py
+"""
+Paridad de contenido por rama: el SHA del árbol raíz del tip de cada rama emparejada
+en Azure y en GitHub. Árboles iguales = mismos archivos en el tip, sin descargar
+contenido; un request liviano por rama y por lado (ninguno si los tips son el mismo
+commit, y los commits repetidos se resuelven una sola vez).
+"""
+import os
+import json
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import GITHUB_TOKEN, AZURE_TOKEN
+from http_cache import cached_get
+import git_mirror
+import ref_snapshot
+import repo_inventory
+import test_commits
+import pytest
+
+# Imports y control de hilos ======
+from concurrent.futures import ThreadPoolExecutor
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+
+_GH_HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+_AZ_AUTH = ("", AZURE_TOKEN)
+
+_trees_lock = threading.Lock()
+_trees = {}   # (lado, repo, commit) -> árbol raíz
+
+
+@pytest.fixture
+def matched_repos():
+    path = os.path.join("data", "repos_output.json")
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data["matched"]
+
+
+def get_azure_root_tree(repo_id, commit_sha, session=None):
+    """treeId del commit en Azure DevOps (None si no existe)."""
+    url = repo_inventory.azure_repo_url(repo_id, f"commits/{commit_sha}")
+    r = cached_get(session, url, params={"api-version": "7.0"}, auth=_AZ_AUTH)
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json().get("treeId")
+
+
+def get_github_root_tree(owner, repo, commit_sha, session=None):
+    """SHA del árbol raíz del commit en GitHub (None si no existe)."""
+    url = f"https://api.github.com/repos/{owner}/{repo}/git/commits/{commit_sha}"
+    r = cached_get(session, url, headers=_GH_HEADERS)
+    if r.status_code in (404, 409, 422):
+        return None
+    r.raise_for_status()
+    return r.json().get("tree", {}).get("sha")
+
+
+def _root_tree(key, fetch):
+    """Árbol raíz memoizado por (lado, repo, commit): ramas con el mismo tip no repiten el request."""
+    with _trees_lock:
+        if key in _trees:
+            return _trees[key]
+    tree = fetch()
+    with _trees_lock:
+        _trees[key] = tree
+    return tree
+
+
+def branch_tips(pair):
+    """({rama: tip} de Azure, {rama: tip} de GitHub) del mismo listado que la etapa de branches."""
+    if git_mirror.enabled():
+        mirror = git_mirror.for_pair(pair)
+        return mirror.refs("azure", "heads"), mirror.refs("github", "heads")
+    azure_refs, github_refs = ref_snapshot.for_pair(pair)
+    return azure_refs.head_tips(), github_refs.head_tips()
+
+
+def plan_content_jobs(pair, branch_pairs):
+    """Jobs (pair, label, az_tip, gh_tip) de 1 repo, uno por rama emparejada."""
+    azure_tips, github_tips = branch_tips(pair)
+    return [
+        (pair, label, azure_tips.get(az_branch), github_tips.get(gh_branch))
+        for (az_branch, gh_branch, label) in branch_pairs
+    ]
+
+
+def _check_branch_content(pair, label, az_tip, gh_tip):
+    """Worker: compara el árbol raíz de los tips de 1 rama. Devuelve el resultado de la rama."""
+    azure_repo, github_repo = pair["azure"], pair["github"]
+    result = {"branch": label, "azure_tip": az_tip, "github_tip": gh_tip,
+              "azure_tree": None, "github_tree": None}
+    try:
+        if not az_tip or not gh_tip:
+            raise RuntimeError("rama sin tip en uno de los lados")
+        if git_mirror.enabled():
+            mirror = git_mirror.open_mirror(azure_repo["repo_id"])
+            az_tree = mirror.git("rev-parse", f"{az_tip}^{{tree}}").strip()
+            gh_tree = az_tree if gh_tip == az_tip else mirror.git("rev-parse", f"{gh_tip}^{{tree}}").strip()
+        else:
+            az_tree = _root_tree(("azure", azure_repo["repo_id"], az_tip),
+                                 lambda: get_azure_root_tree(azure_repo["repo_id"], az_tip))
+            # Mismo commit = mismo árbol: no hace falta preguntarle a GitHub
+            gh_tree = az_tree if gh_tip == az_tip else _root_tree(
+                ("github", github_repo["owner"], github_repo["repo"], gh_tip),
+                lambda: get_github_root_tree(github_repo["owner"], github_repo["repo"], gh_tip))
+        result.update(azure_tree=az_tree, github_tree=gh_tree, match=bool(az_tree) and az_tree == gh_tree)
+    except Exception as e:
+        result.update(match=False, error=str(e))
+    return result
+
+
+def new_repo_entry(repo_name):
+    return {"repo": repo_name, "branches": [], "mismatches": []}
+
+
+def set_repo_error(entry, error):
+    """El repo no se pudo comparar (p.ej. falló el listado de tips): queda como falla, no como OK."""
+    entry["error"] = str(error)
+    print(f"⚠️ Error al listar ramas de {entry['repo']}: {error}")
+
+
+def add_branch_result(entry, result):
+    entry["branches"].append(result)
+    if not result["match"]:
+        entry["mismatches"].append(result["branch"])
+
+
+def branch_log(repo_name, result):
+    if result.get("error"):
+        return f"📦 {repo_name} · ⚠️ {result['branch']}: {result['error']}"
+    if result["match"]:
+        return f"📦 {repo_name} · ✔ {result['branch']}: árbol {result['azure_tree'][:10]}"
+    return (f"📦 {repo_name} · ❌ {result['branch']}: árbol Azure {str(result['azure_tree'])[:10]} "
+            f"≠ GitHub {str(result['github_tree'])[:10]}")
+
+
+def test_content_parity(matched_repos):
+    print("\n🔍 Comparando contenido (árbol raíz) de los tips de cada rama...")
+
+    branch_pairs = test_commits.load_branch_pairs()
+    entries = {}
+    jobs = []
+    for pair in matched_repos:
+        repo_name = pair["azure"]["repo_name"]
+        pairs = branch_pairs.get(repo_name, [])
+        if not pairs:
+            continue
+        entries[repo_name] = new_repo_entry(repo_name)
+        try:
+            jobs.extend(plan_content_jobs(pair, pairs))
+        except Exception as e:
+            set_repo_error(entries[repo_name], e)
+
+    # ====== Todas las ramas de todos los repos en un solo pool ======
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for job, result in zip(jobs, ex.map(lambda job: _check_branch_content(*job), jobs)):
+            repo_name = job[0]["azure"]["repo_name"]
+            print(branch_log(repo_name, result))
+            add_branch_result(entries[repo_name], result)
+
+    os.makedirs("data", exist_ok=True)
+    out = os.path.join("data", "content_parity.json")
+    with open(out, "w") as f:
+        json.dump(list(entries.values()), f, indent=4)
+    print(f"📝 Reporte de paridad de contenido guardado en: {out}")
@@ -0,0 +1,146 @@
+# tests/test_git_refs.py
+"""
+Colector smart HTTP (git_refs) contra un repo bare local servido por `git http-backend`:
+protocolo v2 (ls-refs), anuncio v0 (con líneas ^{} de tags anotados) y GIT_REMOTE_BASE.
+No usa las APIs de Azure ni de GitHub.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import git_refs
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git no está instalado")
+
+_GIT = ["git", "-c", "user.email=test@local", "-c", "user.name=test"]
+
+
+def _git(*args, cwd):
+    return subprocess.run([*_GIT, *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+class _Backend(BaseHTTPRequestHandler):
+    """Pasa cada request a `git http-backend` (CGI) sobre server.root."""
+
+    def log_message(self, *args):
+        pass
+
+    def _run(self, body=b""):
+        url = urlparse(self.path)
+        env = dict(os.environ, GIT_PROJECT_ROOT=self.server.root, GIT_HTTP_EXPORT_ALL="1",
+                   PATH_INFO=url.path, QUERY_STRING=url.query, REQUEST_METHOD=self.command,
+                   CONTENT_TYPE=self.headers.get("Content-Type", ""), CONTENT_LENGTH=str(len(body)))
+        # Sin GIT_PROTOCOL el backend responde v0 aunque el cliente pida v2
+        if self.server.v2 and self.headers.get("Git-Protocol"):
+            env["GIT_PROTOCOL"] = self.headers["Git-Protocol"]
+        self.server.requests.append((self.command, url.path))
+        out = subprocess.run(["git", "http-backend"], input=body, env=env, capture_output=True).stdout
+        head, _, payload = out.partition(b"\r\n\r\n")
+        status, headers = 200, []
+        for line in head.decode().split("\r\n"):
+            key, _, value = line.partition(": ")
+            if key.lower() == "status":
+                status = int(value.split()[0])
+            elif key:
+                headers.append((key, value))
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._run()
+
+    def do_POST(self):
+        self._run(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+
+@pytest.fixture(scope="module")
+def git_server(tmp_path_factory):
+    """Servidor local con github/o/demo.git: ramas, tag liviano, anotado y tag de tag."""
+    root = tmp_path_factory.mktemp("git")
+    work = root / "work"
+    work.mkdir()
+    _git("init", "-q", "-b", "main", cwd=work)
+    for i in range(3):
+        _git("commit", "-q", "--allow-empty", "-m", f"c{i}", cwd=work)
+    for i in range(120):
+        _git("branch", f"feature/b{i}", cwd=work)
+    _git("tag", "light", cwd=work)
+    _git("tag", "-a", "v1", "-m", "anotado", cwd=work)
+    _git("tag", "-a", "v1-nested", "v1", "-m", "tag de tag", cwd=work)
+    bare = root / "github" / "o" / "demo.git"
+    _git("clone", "-q", "--bare", str(work), str(bare), cwd=root)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Backend)
+    server.root, server.v2, server.requests = str(root), True, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, str(bare)
+    server.shutdown()
+
+
+def _expected(bare):
+    """{ref: (sha, peeled)} según `git ls-remote` sobre el repo bare."""
+    refs = {}
+    for line in _git("ls-remote", bare, cwd=os.path.dirname(bare)).splitlines():
+        sha, name = line.split("\t")
+        if name.endswith("^{}"):
+            refs[name[:-3]] = (refs[name[:-3]][0], sha)
+        elif name.startswith(("refs/heads/", "refs/tags/")):
+            refs[name] = (sha, None)
+    return refs
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_port}/github/o/demo.git"
+
+
+def _commit(bare):
+    return _git("rev-parse", "refs/heads/main", cwd=bare).strip()
+
+
+def test_ls_refs_v2(git_server):
+    server, bare = git_server
+    server.v2, server.requests[:] = True, []
+    refs = git_refs.ls_remote(_url(server))
+    assert ("POST", "/github/o/demo.git/git-upload-pack") in server.requests
+    assert refs == _expected(bare)
+    assert len([r for r in refs if r.startswith("refs/heads/")]) == 121
+    # ls-refs con peel: los tags anotados (y el tag de tag) llegan pelados hasta el commit
+    assert refs["refs/tags/v1"][1] == refs["refs/tags/v1-nested"][1] == _commit(bare)
+    assert refs["refs/tags/light"] == (_commit(bare), None)
+
+
+def test_v0_advertisement(git_server):
+    server, bare = git_server
+    server.v2, server.requests[:] = False, []
+    refs = git_refs.ls_remote(_url(server))
+    assert [method for method, _ in server.requests] == ["GET"]
+    assert refs == _expected(bare)
+    # Las líneas refs/tags/x^{} completan el commit pelado del tag anotado
+    assert refs["refs/tags/v1"][1] == refs["refs/tags/v1-nested"][1] == _commit(bare)
+    assert refs["refs/tags/v1"][0] != _commit(bare)
+
+
+def test_prefixes(git_server):
+    server, _ = git_server
+    server.v2 = True
+    refs = git_refs.ls_remote(_url(server), prefixes=("refs/tags/",))
+    assert set(refs) == {"refs/tags/light", "refs/tags/v1", "refs/tags/v1-nested"}
+
+
+def test_remote_base_override(git_server, monkeypatch):
+    server, bare = git_server
+    server.v2 = True
+    monkeypatch.setattr(git_refs, "GIT_REMOTE_BASE", f"http://127.0.0.1:{server.server_port}")
+    url, _ = git_refs.github_remote("o", "demo")
+    assert url == _url(server)
+    assert git_refs.ls_remote(url) == _expected(bare)
@@ -1,34 +1,36 @@
 # tests/test_repository.py
 
-import requests
 import json
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import GITHUB_TOKEN, GITHUB_OWNER, AZURE_TOKEN, AZURE_ORG, AZURE_PROJECT
+from config import GITHUB_OWNER
+import repo_inventory
 
 def get_github_repos():
-    url = f"https://api.github.com/users/{GITHUB_OWNER}/repos?per_page=100"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return [{"repo": r["name"], "owner": GITHUB_OWNER} for r in response.json()]
+    # Todas las páginas (org o usuario), las siguientes a la primera en paralelo
+    return repo_inventory.list_github_repos(GITHUB_OWNER)
 
 def get_azure_repos():
-    url = f"https://dev.azure.com/{AZURE_ORG}/{AZURE_PROJECT}/_apis/git/repositories?api-version=7.0"
-    response = requests.get(url, auth=("", AZURE_TOKEN))
-    response.raise_for_status()
-    return [{"repo_id": r["id"], "repo_name": r["name"], "org": AZURE_ORG, "project": AZURE_PROJECT} for r in response.json()["value"]]
+    # Todos los proyectos de AZURE_PROJECTS en paralelo
+    return repo_inventory.list_azure_repos()
 
-def test_generate_repo_list_json():
+def generate_repo_report():
+    """Empareja repos por nombre, escribe data/repos_output.json y devuelve el reporte."""
     print("\n📦 Obteniendo repositorios...")
 
     github_repos = get_github_repos()
     azure_repos = get_azure_repos()
 
     # Crear diccionarios por nombre (case insensitive)
-    azure_names_dict = {r["repo_name"].lower(): r for r in azure_repos}
+    azure_names_dict = {}
+    for r in azure_repos:
+        key = r["repo_name"].lower()
+        if key in azure_names_dict:
+            print(f"⚠️ Repo '{r['repo_name']}' repetido en Azure ({azure_names_dict[key]['project']} y {r['project']}); se usa el primero")
+            continue
+        azure_names_dict[key] = r
     github_names_dict = {r["repo"].lower(): r for r in github_repos}
 
     matched_keys = set(azure_names_dict.keys()) & set(github_names_dict.keys())
@@ -61,6 +63,10 @@ def test_generate_repo_list_json():
     print(f"❌ Repositorios solo en Azure DevOps: {len(only_in_azure)}")
     print(f"❌ Repositorios solo en GitHub: {len(only_in_github)}")
     print(f"📝 Archivo generado: {output_path}")
+    return report
+
+def test_generate_repo_list_json():
+    generate_repo_report()
 
 def test_dummy():
     print("✅ test_repository ejecutado.")
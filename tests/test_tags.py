@@ -1,14 +1,20 @@
 # tests/test_tags.py
 
-import requests
 import json
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import GITHUB_TOKEN, GITHUB_OWNER, AZURE_TOKEN, AZURE_ORG, AZURE_PROJECT
+import ref_tips
+import ref_snapshot
+import git_mirror
+import github_graphql
 import pytest
 
+# Imports y control de hilos ======
+from concurrent.futures import ThreadPoolExecutor
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+
 
 @pytest.fixture
 def matched_repos():
@@ -17,66 +23,83 @@ def matched_repos():
         data = json.load(f)
     return data["matched"]
 
-def get_github_tags(repo_name):
-    url = f"https://api.github.com/repos/{GITHUB_OWNER}/{repo_name}/tags"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        return []
-    return [t["name"] for t in response.json()]
-
-def get_azure_tags(repo_id):
-    url = f"https://dev.azure.com/{AZURE_ORG}/{AZURE_PROJECT}/_apis/git/repositories/{repo_id}/refs?filter=tags/&api-version=7.0"
-    response = requests.get(url, auth=("", AZURE_TOKEN))
-    if response.status_code != 200:
-        return []
-    return [ref["name"].split("refs/tags/")[-1] for ref in response.json().get("value", [])]
-
-def test_compare_tags(matched_repos):
-    print("🔍 Comparando tags entre Azure y GitHub...\n")
-
-    results = []
-
-    for pair in matched_repos:
-        azure_repo = pair["azure"]
-        github_repo = pair["github"]
-        repo_name = azure_repo["repo_name"]
-        print(f"📦 Repositorio: {repo_name}")
-
-        azure_tags = get_azure_tags(azure_repo["repo_id"])
-        github_tags = get_github_tags(github_repo["repo"])
-
-        shared_tags = sorted(set(azure_tags) & set(github_tags))
-        only_in_azure = sorted(set(azure_tags) - set(github_tags))
-        only_in_github = sorted(set(github_tags) - set(azure_tags))
-
-        # 🖨 Mensajes de consola mejorados
-        if not azure_tags and not github_tags:
-            print("⚠️ No se encontraron tags ni en Azure ni en GitHub para este repositorio.")
+def _compare_tags_pair(pair):
+    """Worker: compara los tags de 1 repo emparejado. Devuelve log + entrada del reporte."""
+    azure_repo = pair["azure"]
+    repo_name = azure_repo["repo_name"]
+    log_lines = [f"📦 Repositorio: {repo_name}"]
+
+    # {tag: commit pelado} del mismo listado de refs que la etapa de branches
+    try:
+        if git_mirror.enabled():
+            mirror = git_mirror.for_pair(pair)
+            azure_tag_tips, github_tag_tips = mirror.refs("azure", "tags"), mirror.refs("github", "tags")
         else:
-            print(f"🔁 Tags en Azure:  {azure_tags if azure_tags else '⚠️ Ninguno'}")
-            print(f"🔁 Tags en GitHub: {github_tags if github_tags else '⚠️ Ninguno'}")
-            print(f"✅ Tags comunes:   {shared_tags if shared_tags else '⚠️ Ninguno'}")
-
-            if only_in_azure:
-                print(f"⚠️ Solo en Azure:  {only_in_azure}")
-            if only_in_github:
-                print(f"⚠️ Solo en GitHub: {only_in_github}")
-
-        results.append({
+            azure_refs, github_refs = ref_snapshot.for_pair(pair)
+            azure_tag_tips, github_tag_tips = azure_refs.tag_tips(), github_refs.tag_tips()
+    except Exception as e:
+        return {"log": f"⚠️ Error al listar tags para {repo_name}: {e}", "entry": None}
+    ref_tips.record(repo_name, "azure", "tags", azure_tag_tips)
+    ref_tips.record(repo_name, "github", "tags", github_tag_tips)
+
+    azure_tags = list(azure_tag_tips)
+    github_tags = list(github_tag_tips)
+
+    shared_tags = sorted(set(azure_tags) & set(github_tags))
+    only_in_azure = sorted(set(azure_tags) - set(github_tags))
+    only_in_github = sorted(set(github_tags) - set(azure_tags))
+    # Mismo nombre en ambos lados pero apuntando a otro commit
+    target_mismatches = [
+        {"tag": t, "azure": azure_tag_tips[t], "github": github_tag_tips[t]}
+        for t in shared_tags if azure_tag_tips[t] != github_tag_tips[t]
+    ]
+
+    # 🖨 Mensajes de consola mejorados
+    if not azure_tags and not github_tags:
+        log_lines.append("⚠️ No se encontraron tags ni en Azure ni en GitHub para este repositorio.")
+    else:
+        log_lines.append(f"🔁 Tags en Azure:  {azure_tags if azure_tags else '⚠️ Ninguno'}")
+        log_lines.append(f"🔁 Tags en GitHub: {github_tags if github_tags else '⚠️ Ninguno'}")
+        log_lines.append(f"✅ Tags comunes:   {shared_tags if shared_tags else '⚠️ Ninguno'}")
+
+        if only_in_azure:
+            log_lines.append(f"⚠️ Solo en Azure:  {only_in_azure}")
+        if only_in_github:
+            log_lines.append(f"⚠️ Solo en GitHub: {only_in_github}")
+        if target_mismatches:
+            log_lines.append(f"❌ Distinto commit:  {[m['tag'] for m in target_mismatches]}")
+
+    log_lines.append("")  # Línea vacía
+    return {
+        "log": "\n".join(log_lines),
+        "entry": {
             "repo": repo_name,
             "azure_tags": azure_tags,
             "github_tags": github_tags,
             "shared_tags": shared_tags,
             "only_in_azure": only_in_azure,
-            "only_in_github": only_in_github
-        })
+            "only_in_github": only_in_github,
+            "target_mismatches": target_mismatches
+        }
+    }
+
+def test_compare_tags(matched_repos):
+    print("🔍 Comparando tags entre Azure y GitHub...\n")
+
+    results = []
+    github_graphql.prefetch_pairs(matched_repos)
 
-        print("")  # Línea vacía
+    # ====== Paralelismo por repo emparejado (map conserva el orden de matched_repos) ======
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for res in ex.map(_compare_tags_pair, matched_repos):
+            print(res["log"])
+            if res["entry"] is not None:
+                results.append(res["entry"])
 
     # Guardar el resultado
     os.makedirs("data", exist_ok=True)
     with open("data/tags_comparison.json", "w") as f:
         json.dump(results, f, indent=4)
 
+    ref_tips.flush()
     print("📝 Reporte de comparación de tags guardado en: data/tags_comparison.json")
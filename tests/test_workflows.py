@@ -1,13 +1,18 @@
 # tests/test_workflows.py
 import os
 import json
-import requests
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import GITHUB_TOKEN  # usa tus credenciales
+import ref_tips
+import github_graphql
+import workflow_templates
 import pytest
 
+# Imports y control de hilos ======
+from concurrent.futures import ThreadPoolExecutor
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "12"))
+
 # Archivos requeridos dentro de .github/workflows/
 REQUIRED_WORKFLOWS = [
     "workflow-dev.yml",
@@ -16,23 +21,98 @@ REQUIRED_WORKFLOWS = [
     "workflows-pr.yml",  # <- según tu especificación
 ]
 
-def list_workflow_files(owner: str, repo: str):
-    """
-    Lista los archivos dentro de .github/workflows de un repo de GitHub.
-    Retorna [] si la carpeta no existe (404) o está vacía.
-    """
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/.github/workflows"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    r = requests.get(url, headers=headers)
-    if r.status_code == 404:
-        # La carpeta .github o workflows no existe
-        return []
-    r.raise_for_status()
-    data = r.json()
-    # Si la API devuelve un dict, puede ser archivo individual (raro aquí), si es lista son los elementos del dir
-    if isinstance(data, list):
-        return [item.get("name", "") for item in data if item.get("type") == "file"]
-    return []
+def _required_templates():
+    """Blob de la plantilla de cada archivo requerido que tiene plantilla."""
+    templates = workflow_templates.template_blobs()
+    return {f: templates[f] for f in REQUIRED_WORKFLOWS if f in templates}
+
+def load_previous_workflow_results():
+    """Resultados de la corrida anterior por repo de GitHub (re-certificación incremental)."""
+    path = os.path.join("data", "workflows_check.json")
+    if not ref_tips.INCREMENTAL or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return {w["repo"]: w for w in json.load(f) if "error" not in w}
+    except (OSError, ValueError):
+        return {}
+
+def _error_entry(owner, repo, error):
+    return {
+        "repo": repo,
+        "owner": owner,
+        "workflow_dir_exists": False,
+        "present_files": [],
+        "required_files": REQUIRED_WORKFLOWS,
+        "missing_files": REQUIRED_WORKFLOWS[:],
+        "drifted_files": [],
+        "ok": False,
+        "error": str(error)
+    }
+
+def _check_workflows_pair(pair, previous):
+    """Worker: valida .github/workflows de 1 repo emparejado. Devuelve log + entrada del reporte."""
+    gh = pair["github"]
+    owner = gh["owner"]
+    repo = gh["repo"]
+
+    log_lines = [f"📦 {owner}/{repo} ..."]
+
+    # Sin plantillas no se puede verificar el contenido: error visible, no un OK vacío
+    try:
+        templates = _required_templates()
+    except RuntimeError as e:
+        log_lines.append(f"   ❌ Sin plantillas de workflows: {e}")
+        return {"log": "\n".join(log_lines), "entry": _error_entry(owner, repo, e)}
+
+    # Ninguna rama de GitHub cambió desde la última corrida: mismo contenido de workflows
+    prev = previous.get(repo)
+    if prev is not None and prev.get("required_files") == REQUIRED_WORKFLOWS \
+            and prev.get("template_blobs") == templates \
+            and ref_tips.heads_unchanged(pair["azure"]["repo_name"], "github"):
+        log_lines.append("   ♻️  Sin cambios desde la última corrida (resultado anterior).")
+        return {"log": "\n".join(log_lines), "entry": {**prev, "carried_forward": True}}
+
+    try:
+        gql = github_graphql.get(owner, repo)
+        if gql is not None:
+            # Entradas del árbol .github/workflows (con su blob) ya traídas en el lote GraphQL
+            blobs = workflow_templates.workflow_blobs_from_graphql(gql["workflows"])
+        else:
+            blobs = workflow_templates.workflow_blobs(owner, repo)
+        files = list(blobs)
+        missing = [f for f in REQUIRED_WORKFLOWS if f not in files]
+        # Presentes pero con contenido distinto a la plantilla canónica
+        drifted = [f for f in REQUIRED_WORKFLOWS
+                   if f in blobs and workflow_templates.matches_template(f, blobs[f]) is False]
+        exists_all = len(missing) == 0
+
+        if exists_all:
+            log_lines.append("   ✅ Todos los workflows requeridos presentes.")
+        else:
+            log_lines.append(f"   ❌ Faltan: {missing}")
+        if drifted:
+            log_lines.append(f"   ❌ Distintos a la plantilla: {drifted}")
+        untemplated = workflow_templates.untemplated(REQUIRED_WORKFLOWS)
+        if untemplated:
+            log_lines.append(f"   ⚠️ Sin plantilla (solo presencia): {untemplated}")
+
+        entry = {
+            "repo": repo,
+            "owner": owner,
+            "workflow_dir_exists": len(files) > 0,
+            "present_files": sorted(files),
+            "required_files": REQUIRED_WORKFLOWS,
+            "missing_files": missing,
+            "drifted_files": drifted,
+            "untemplated_files": untemplated,
+            "template_blobs": templates,
+            "ok": exists_all and not drifted
+        }
+    except Exception as e:
+        log_lines.append(f"   ⚠️ Error al validar workflows: {e}")
+        entry = _error_entry(owner, repo, e)
+    return {"log": "\n".join(log_lines), "entry": entry}
 
 def test_workflows_presence(matched_repos):
     """
@@ -42,43 +122,14 @@ def test_workflows_presence(matched_repos):
     print("\n🔍 Validando .github/workflows en repos de GitHub...")
 
     results = []
-    for pair in matched_repos:
-        gh = pair["github"]
-        owner = gh["owner"]
-        repo = gh["repo"]
-
-        print(f"📦 {owner}/{repo} ...")
-        try:
-            files = list_workflow_files(owner, repo)
-            missing = [f for f in REQUIRED_WORKFLOWS if f not in files]
-            exists_all = len(missing) == 0
-
-            if exists_all:
-                print("   ✅ Todos los workflows requeridos presentes.")
-            else:
-                print(f"   ❌ Faltan: {missing}")
-
-            results.append({
-                "repo": repo,
-                "owner": owner,
-                "workflow_dir_exists": len(files) > 0,
-                "present_files": sorted(files),
-                "required_files": REQUIRED_WORKFLOWS,
-                "missing_files": missing,
-                "ok": exists_all
-            })
-        except Exception as e:
-            print(f"   ⚠️ Error al validar workflows: {e}")
-            results.append({
-                "repo": repo,
-                "owner": owner,
-                "workflow_dir_exists": False,
-                "present_files": [],
-                "required_files": REQUIRED_WORKFLOWS,
-                "missing_files": REQUIRED_WORKFLOWS[:],
-                "ok": False,
-                "error": str(e)
-            })
+    previous = load_previous_workflow_results()
+    github_graphql.prefetch_pairs(matched_repos)
+
+    # ====== Paralelismo por repo emparejado (map conserva el orden de matched_repos) ======
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for res in ex.map(lambda pair: _check_workflows_pair(pair, previous), matched_repos):
+            print(res["log"])
+            results.append(res["entry"])
 
     os.makedirs("data", exist_ok=True)
     out = os.path.join("data", "workflows_check.json")
@@ -0,0 +1,125 @@
+# workflow_templates.py
+"""
+Verificación de workflows contra las plantillas canónicas, sin descargar contenido.
+
+El hash de blob de git de cada plantilla (WORKFLOW_TEMPLATES_DIR, por defecto
+templates/workflows del repo) se calcula localmente: sha1("blob <largo>\\0" + bytes). Del lado
+de GitHub alcanza con el SHA de blob de cada archivo de .github/workflows:
+
+  - del lote GraphQL (entradas del árbol con su oid), si está disponible
+  - si no, de UN llamado a /git/trees/HEAD?recursive=1 (rama por defecto)
+
+Un archivo requerido cuyo blob difiere del de su plantilla es drift. Un archivo
+requerido sin plantilla en el directorio solo se controla por presencia: se avisa
+una vez por corrida y la etapa lo informa en 'untemplated_files'. Si el directorio de
+plantillas falta o está vacío, template_blobs() falla: sin plantillas no hay control
+de drift y la etapa lo reporta como error en lugar de dar todo por bueno.
+"""
+
+import hashlib
+import os
+import threading
+
+from config import GITHUB_TOKEN
+from http_cache import cached_get
+
+WORKFLOW_TEMPLATES_DIR = os.getenv(
+    "WORKFLOW_TEMPLATES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "workflows"),
+)
+WORKFLOWS_PATH = ".github/workflows/"
+
+_GH_HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+
+_lock = threading.Lock()
+_templates = None       # {archivo: blob sha} de las plantillas
+_warned = False
+
+
+def git_blob_sha(data):
+    """SHA-1 de git para un blob con este contenido (igual que `git hash-object`)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def template_blobs():
+    """
+    {archivo: blob sha} de las plantillas canónicas. RuntimeError si el directorio no
+    existe o no tiene plantillas.
+    """
+    global _templates
+    with _lock:
+        if _templates is None:
+            if not os.path.isdir(WORKFLOW_TEMPLATES_DIR):
+                raise RuntimeError(f"No existe el directorio de plantillas {WORKFLOW_TEMPLATES_DIR}")
+            templates = {}
+            for name in sorted(os.listdir(WORKFLOW_TEMPLATES_DIR)):
+                path = os.path.join(WORKFLOW_TEMPLATES_DIR, name)
+                if os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        templates[name] = git_blob_sha(f.read())
+            if not templates:
+                raise RuntimeError(f"El directorio de plantillas {WORKFLOW_TEMPLATES_DIR} está vacío")
+            _templates = templates
+        return _templates
+
+
+def untemplated(required):
+    """Archivos de 'required' sin plantilla (avisa una sola vez por proceso)."""
+    global _warned
+    templates = template_blobs()
+    missing = [f for f in required if f not in templates]
+    with _lock:
+        if missing and not _warned:
+            _warned = True
+            print(f"⚠️  [workflows] Sin plantilla en {WORKFLOW_TEMPLATES_DIR} para {missing}: "
+                  "solo se controla que existan, no su contenido.")
+    return missing
+
+
+def matches_template(name, blob_sha):
+    """True/False si el blob coincide con la plantilla de 'name'; None si no hay plantilla."""
+    expected = template_blobs().get(name)
+    return None if expected is None else blob_sha == expected
+
+
+def workflow_blobs_from_graphql(entries):
+    """{archivo: blob sha} de las entradas del árbol .github/workflows del lote GraphQL."""
+    return {e["name"]: e["oid"] for e in (entries or []) if e["type"] == "blob"}
+
+
+def workflow_blobs(owner, repo, session=None):
+    """
+    {archivo: blob sha} de .github/workflows en la rama por defecto, con un solo
+    llamado recursivo a la API de árboles. {} si el repo está vacío o no existe.
+    """
+    url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/HEAD"
+    r = cached_get(session, url, params={"recursive": 1}, headers=_GH_HEADERS)
+    if r.status_code in (404, 409):
+        return {}
+    r.raise_for_status()
+    data = r.json()
+    if data.get("truncated"):
+        # Árbol de más de 100k entradas: se pide solo el subárbol de workflows
+        return _workflows_subtree(owner, repo, data, session)
+    return {
+        item["path"][len(WORKFLOWS_PATH):]: item["sha"]
+        for item in data.get("tree", [])
+        if item.get("type") == "blob" and item["path"].startswith(WORKFLOWS_PATH)
+        and "/" not in item["path"][len(WORKFLOWS_PATH):]
+    }
+
+
+def _workflows_subtree(owner, repo, root, session):
+    """Recorre raíz -> .github -> workflows sin recursive cuando el árbol recursivo vino truncado."""
+    sha = root.get("sha")
+    for part in (".github", "workflows"):
+        r = cached_get(session, f"https://api.github.com/repos/{owner}/{repo}/git/trees/{sha}",
+                       headers=_GH_HEADERS)
+        r.raise_for_status()
+        sha = next((t["sha"] for t in r.json().get("tree", []) if t["path"] == part and t["type"] == "tree"), None)
+        if sha is None:
+            return {}
+    r = cached_get(session, f"https://api.github.com/repos/{owner}/{repo}/git/trees/{sha}",
+                   headers=_GH_HEADERS)
+    r.raise_for_status()
+    return {t["path"]: t["sha"] for t in r.json().get("tree", []) if t.get("type") == "blob"}